@@ -1,49 +1,141 @@
-from fastapi import APIRouter, Query
+from datetime import date, datetime, time, timedelta
+from beanie.odm.utils.find import construct_lookup_queries
+from beanie.odm.utils.parsing import parse_obj
+from fastapi import APIRouter, HTTPException, Query, Response
 from typing import List
+from app.core.cache import cache_resposta
+from app.core.contagem import DESCRICAO_COM_TOTAL, pagina_e_total
+from app.core.paginacao import definir_proximo_cursor, filtro_cursor, ordenacao
 from app.models.contrato import Contrato
 from app.models.imovel import Imovel
 
 router = APIRouter(prefix="/consultas", tags=["Consultas Avançadas"])
 
+def _intervalo_vencimento(
+    ano: int | None, mes: int | None, dias: int | None
+) -> tuple[datetime, datetime]:
+    """
+    Converte os parâmetros da consulta em um intervalo semiaberto [inicio, fim) de data_fim.
+    Um intervalo simples sobre o campo é atendido pelo índice, ao contrário de $year/$month.
+    """
+    if dias is not None:
+        inicio = datetime.combine(date.today(), time.min)
+        return inicio, inicio + timedelta(days=dias + 1)
+    if ano is None or mes is None:
+        raise HTTPException(status_code=400, detail="Informe ano e mes, ou dias")
+    inicio = datetime(ano, mes, 1)
+    fim = datetime(ano + 1, 1, 1) if mes == 12 else datetime(ano, mes + 1, 1)
+    return inicio, fim
+
+
 @router.get("/contratos-por-vencimento")
+@cache_resposta("contratos", "imoveis", "inquilinos", "proprietarios")
 async def filtrar_contratos_vencimento(
-    ano: int,
-    mes: int,
+    response: Response,
+    # O fim do intervalo de dezembro cai no ano seguinte, e datetime vai só até 9999
+    ano: int | None = Query(None, ge=1, le=9998),
+    mes: int | None = Query(None, ge=1, le=12),
+    dias: int | None = Query(
+        None, ge=0, le=3650, description="Contratos que vencem de hoje até daqui a N dias (até 10 anos)"
+    ),
+    status: str | None = Query(None, description="Filtrar por status (Ativo, Encerrado, Cancelado)"),
     page: int = Query(1, ge=1),
-    page_size: int = Query(10, ge=1, le=100)
+    page_size: int = Query(10, ge=1, le=100),
+    cursor: str | None = Query(None, description="Cursor da próxima página (header X-Next-Cursor)"),
+    resolver_links: bool = Query(
+        True, description="Traz imóvel e inquilino por inteiro ($lookup); com false, só os resumos do contrato"
+    ),
+    com_total: bool = Query(False, description=DESCRICAO_COM_TOTAL)
 ):
+    """
+    Lista contratos que vencem em um mês (ano + mes) ou nos próximos N dias (dias).
+    O resultado é ordenado por data_fim e paginado por page ou por cursor.
+    Com resolver_links=false a consulta é atendida só pela coleção de contratos,
+    usando os resumos de imóvel e inquilino guardados neles.
+    Com com_total=true a resposta é {items, total}, vindos do mesmo $facet.
+    """
     skip = (page - 1) * page_size
-    contratos = await Contrato.find(
-        {
-            "$expr": {
-                "$and": [
-                    {"$eq": [{"$year": "$data_fim"}, ano]},
-                    {"$eq": [{"$month": "$data_fim"}, mes]}
-                ]
-            }
-        },
-        fetch_links=True
-    ).skip(skip).limit(page_size).to_list()
+    inicio, fim = _intervalo_vencimento(ano, mes, dias)
+    filtros = [{"data_fim": {"$gte": inicio, "$lt": fim}}]
+    if status:
+        filtros.append({"status": status})
+    lookups = construct_lookup_queries(Contrato) if resolver_links else []
+
+    if com_total:
+        documentos, total = await pagina_e_total(
+            Contrato, {"$and": filtros}, ordenacao("data_fim"), 0 if cursor else skip, page_size,
+            filtro_pagina=filtro_cursor(cursor, "data_fim") if cursor else None,
+            complemento=lookups,
+        )
+        contratos = [parse_obj(Contrato, documento) for documento in documentos]
+        definir_proximo_cursor(response, contratos, page_size, "data_fim")
+        return {"items": contratos, "total": total}
+
+    # Com cursor a página é buscada por keyset e o page é ignorado
+    if cursor:
+        filtros.append(filtro_cursor(cursor, "data_fim"))
+        skip = 0
+
+    # Filtra, ordena e pagina pelo índice antes de resolver os links,
+    # para que o $lookup rode só nos documentos da página
+    pipeline = [
+        {"$match": {"$and": filtros}},
+        {"$sort": dict(ordenacao("data_fim"))},
+        {"$skip": skip},
+        {"$limit": page_size},
+        *lookups,
+    ]
+    contratos = await Contrato.aggregate(pipeline, projection_model=Contrato).to_list()
+    definir_proximo_cursor(response, contratos, page_size, "data_fim")
     return contratos
 
 @router.get("/imoveis-busca-texto")
+@cache_resposta("imoveis")
 async def busca_textual_imoveis(
+    response: Response,
     termo: str,
-    ordenar_por: str = Query("valor_aluguel_base", enum=["valor_aluguel_base", "apelido_imovel"]),
+    ordenar_por: str = Query("valor_aluguel_base", enum=["valor_aluguel_base", "apelido_imovel", "relevancia"]),
     direcao: str = Query("asc", enum=["asc", "desc"]),
-    page: int = 1,
-    page_size: int = 10
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    cursor: str | None = Query(None, description="Cursor da próxima página (header X-Next-Cursor)"),
+    com_total: bool = Query(False, description=DESCRICAO_COM_TOTAL)
 ):
+    """
+    Busca textual em apelido, endereço e descrição usando o índice de texto do MongoDB.
+    Ignora acentos e maiúsculas e reconhece variações das palavras em português.
+    Com ordenar_por=relevancia os resultados vêm do mais para o menos relevante.
+    Com com_total=true a resposta é {items, total}, vindos do mesmo $facet.
+    """
     skip = (page - 1) * page_size
-    query_filter = {
-        "$or": [
-            {"apelido_imovel": {"$regex": termo, "$options": "i"}},
-            {"endereco": {"$regex": termo, "$options": "i"}}
-        ]
-    }
+    campo = ordenar_por
     sort_dir = 1 if direcao == "asc" else -1
-    
-    imoveis = await Imovel.find(query_filter)\
-        .sort((ordenar_por, sort_dir))\
-        .skip(skip).limit(page_size).to_list()
-    return imoveis
\ No newline at end of file
+    filtros = {"$text": {"$search": termo}}
+    relevancia = []
+    if ordenar_por == "relevancia":
+        campo, sort_dir = "score", -1
+        relevancia = [{"$addFields": {"score": {"$meta": "textScore"}}}]
+
+    if com_total:
+        documentos, total = await pagina_e_total(
+            Imovel, filtros, ordenacao(campo, sort_dir), 0 if cursor else skip, page_size,
+            filtro_pagina=filtro_cursor(cursor, campo, sort_dir) if cursor else None,
+            preparo=relevancia,
+        )
+        definir_proximo_cursor(response, documentos, page_size, campo)
+        return {"items": [Imovel.model_validate(doc) for doc in documentos], "total": total}
+
+    pipeline = [{"$match": filtros}, *relevancia]
+    # O cursor guarda o valor da ordenação e o _id do último item da página
+    if cursor:
+        pipeline.append({"$match": filtro_cursor(cursor, campo, sort_dir)})
+        skip = 0
+    pipeline += [
+        {"$sort": dict(ordenacao(campo, sort_dir))},
+        {"$skip": skip},
+        {"$limit": page_size},
+    ]
+
+    documentos = await Imovel.aggregate(pipeline).to_list()
+    definir_proximo_cursor(response, documentos, page_size, campo)
+    return [Imovel.model_validate(doc) for doc in documentos]
\ No newline at end of file
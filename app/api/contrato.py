@@ -2,14 +2,39 @@
 Rotas da API para gerenciamento de Contratos.
 Implementa a relação Muitos-para-Muitos entre Inquilino e Imóvel.
 """
-from beanie import PydanticObjectId
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+from collections import defaultdict
+from collections.abc import Iterable
+from beanie import PydanticObjectId, UpdateResponse
+from beanie.odm.utils.encoder import Encoder
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from pymongo import ReturnDocument
+from app.core.cache import invalidar
+from app.core.cache_entidades import cache_entidades
+from app.core.contagem import DESCRICAO_COM_TOTAL, pagina_e_total, resposta_com_total
+from app.core.config import settings
+from app.core.etag import (
+    MENSAGEM_PRECONDICAO, aplicar_set, etag, ler_cru, responder_nao_modificado,
+    verificar_if_match,
+)
+from app.core.expansao import DESCRICAO_EXPAND, CarregadorLinks, campos_expansao
+from app.core.lote import buscar_em_lote, erro_item, inserir_em_lote, ordenar_resultados
+from app.core.paginacao import definir_proximo_cursor, filtro_cursor, ordenacao
+from app.core.projecao import DESCRICAO_FIELDS, modelo_projecao, resposta_projetada
+from app.core.serializacao import listar_crus, resposta_rapida
+from app.database.database import transacao
 from app.models.contrato import Contrato, ContratoCreate, ContratoUpdate
 from app.models.inquilino import Inquilino
 from app.models.imovel import Imovel
+from app.models.lote import ResultadoBuscaLote, ResultadoItemLote
+from app.models.reajuste import ReajusteCreate, ResultadoReajuste
+from app.models.vencimento import ExecucaoVencimento
+from app.services import estatisticas, reajuste, resumos, vencimentos
 
 router = APIRouter(prefix="/contratos", tags=["Contratos"])
 
+MENSAGEM_JA_ALUGADO = "Este imóvel já está alugado. Encerre o contrato atual antes de criar um novo."
+
 
 @router.post("/", response_model=Contrato)
 async def criar_contrato(dados: ContratoCreate):
@@ -21,6 +46,12 @@ async def criar_contrato(dados: ContratoCreate):
     - O imóvel deve existir
     - O imóvel não pode estar com status "Alugado" (já possui contrato ativo)
     
+    O imóvel é reservado com um único find_one_and_update condicional (só casa se
+    ainda não estiver alugado), então duas requisições simultâneas não conseguem
+    alugar o mesmo imóvel. A reserva e a inserção do contrato rodam na mesma
+    transação quando MONGODB_TRANSACOES está ligado; sem transação, a reserva é
+    desfeita se a inserção falhar.
+    
     Args:
         dados: Dados do contrato a ser criado.
     
@@ -38,80 +69,334 @@ async def criar_contrato(dados: ContratoCreate):
     if not PydanticObjectId.is_valid(dados.id_imovel):
         raise HTTPException(status_code=400, detail="ID de imóvel inválido")
     
+    # Validar datas antes de qualquer escrita
+    if dados.data_fim <= dados.data_inicio:
+        raise HTTPException(
+            status_code=400, 
+            detail="A data de fim deve ser posterior à data de início"
+        )
+    
     # Buscar inquilino
-    inquilino = await Inquilino.get(dados.id_inquilino)
-    if not inquilino:
+    documento_inquilino = await cache_entidades.obter(Inquilino, PydanticObjectId(dados.id_inquilino))
+    if not documento_inquilino:
         raise HTTPException(status_code=404, detail="Inquilino não encontrado")
+    inquilino = Inquilino.model_validate(documento_inquilino)
+    
+    id_imovel = PydanticObjectId(dados.id_imovel)
+    async with transacao() as sessao:
+        # Reservar o imóvel: a condição no filtro impede que dois contratos o aluguem
+        imovel = await Imovel.find_one(
+            {"_id": id_imovel, "status": {"$ne": "Alugado"}}
+        ).update(
+            {"$set": {"status": "Alugado"}},
+            session=sessao,
+            response_type=UpdateResponse.OLD_DOCUMENT,
+        )
+        if imovel:
+            status_anterior = imovel.status
+            imovel.status = "Alugado"
+            novo_contrato = Contrato(
+                inquilino=inquilino,
+                imovel=imovel,
+                data_inicio=dados.data_inicio,
+                mes_aniversario=dados.data_inicio.month,
+                data_fim=dados.data_fim,
+                valor_aluguel=dados.valor_aluguel,
+                status="Ativo",
+                resumo_imovel=resumos.resumo_imovel(imovel),
+                resumo_inquilino=resumos.resumo_inquilino(inquilino),
+            )
+            try:
+                await novo_contrato.insert(session=sessao)
+            except Exception:
+                if sessao is None:
+                    await Imovel.find_one({"_id": id_imovel, "status": "Alugado"}).update(
+                        {"$set": {"status": status_anterior}}
+                    )
+                    await cache_entidades.invalidar(Imovel, id_imovel)
+                raise
     
-    # Buscar imóvel
-    imovel = await Imovel.get(dados.id_imovel)
     if not imovel:
-        raise HTTPException(status_code=404, detail="Imóvel não encontrado")
+        # A reserva não casou: ou o imóvel não existe ou já está alugado
+        if not await Imovel.find_one({"_id": id_imovel}):
+            raise HTTPException(status_code=404, detail="Imóvel não encontrado")
+        raise HTTPException(status_code=400, detail=MENSAGEM_JA_ALUGADO)
+    
+    await estatisticas.registrar_receita(novo_contrato.valor_aluguel)
+    await cache_entidades.invalidar(Imovel, id_imovel)
+    await invalidar("contratos", "imoveis")
+    return novo_contrato
+
+
+async def _liberar_reservas(
+    candidatos: dict[int, PydanticObjectId],
+    status_anteriores: dict[int, str],
+    indices: Iterable[int],
+) -> None:
+    """Devolve ao status anterior os imóveis reservados pelos itens informados do lote."""
+    liberar = defaultdict(list)
+    for indice in indices:
+        liberar[status_anteriores[indice]].append(candidatos[indice])
+    for status_anterior, ids in liberar.items():
+        await Imovel.find({"_id": {"$in": ids}, "status": "Alugado"}).update(
+            {"$set": {"status": status_anterior}}
+        )
+
+
+@router.post("/bulk", response_model=list[ResultadoItemLote])
+async def criar_contratos_em_lote(
+    dados: list[ContratoCreate] = Body(max_length=settings.BULK_MAX_ITENS)
+):
+    """
+    Cria vários contratos de uma vez, com as mesmas regras da criação individual.
     
-    # Verificar se o imóvel já está alugado
-    if imovel.status == "Alugado":
-        raise HTTPException(
-            status_code=400, 
-            detail="Este imóvel já está alugado. Encerre o contrato atual antes de criar um novo."
+    Inquilinos e imóveis são buscados com uma consulta $in por coleção. Cada imóvel
+    é então reservado com um find_one_and_update condicional (só casa se ainda não
+    estiver alugado), todos disparados em paralelo, e só os contratos dos imóveis
+    efetivamente reservados são gravados com um insert_many não ordenado. A reserva
+    dos itens cuja inserção falhou é desfeita. Dentro do lote, só o primeiro
+    contrato de cada imóvel é aceito.
+    
+    Args:
+        dados: Lista de contratos a criar.
+    
+    Returns:
+        Resultado de cada item, na ordem enviada (criado com id, ou erro com o motivo).
+    """
+    resultados = {}
+    ids_inquilinos, ids_imoveis = set(), set()
+    for indice, item in enumerate(dados):
+        if not PydanticObjectId.is_valid(item.id_inquilino):
+            resultados[indice] = erro_item(indice, 400, "ID de inquilino inválido")
+        elif not PydanticObjectId.is_valid(item.id_imovel):
+            resultados[indice] = erro_item(indice, 400, "ID de imóvel inválido")
+        else:
+            ids_inquilinos.add(PydanticObjectId(item.id_inquilino))
+            ids_imoveis.add(PydanticObjectId(item.id_imovel))
+
+    inquilinos = {
+        inq.id: inq
+        for inq in await Inquilino.find({"_id": {"$in": list(ids_inquilinos)}}).to_list()
+    }
+    cursor_imoveis = Imovel.get_motor_collection().find(
+        {"_id": {"$in": list(ids_imoveis)}}, {"_id": 1}
+    )
+    existentes = {documento["_id"] async for documento in cursor_imoveis}
+
+    candidatos, imoveis_no_lote = {}, set()
+    for indice, item in enumerate(dados):
+        if indice in resultados:
+            continue
+        id_imovel = PydanticObjectId(item.id_imovel)
+        if PydanticObjectId(item.id_inquilino) not in inquilinos:
+            resultados[indice] = erro_item(indice, 404, "Inquilino não encontrado")
+        elif id_imovel not in existentes:
+            resultados[indice] = erro_item(indice, 404, "Imóvel não encontrado")
+        elif id_imovel in imoveis_no_lote:
+            resultados[indice] = erro_item(indice, 400, MENSAGEM_JA_ALUGADO)
+        elif item.data_fim <= item.data_inicio:
+            resultados[indice] = erro_item(
+                indice, 400, "A data de fim deve ser posterior à data de início"
+            )
+        else:
+            candidatos[indice] = id_imovel
+            imoveis_no_lote.add(id_imovel)
+
+    # Reservar os imóveis: a condição no filtro impede que outro contrato os alugue
+    reservas = await asyncio.gather(*(
+        Imovel.find_one({"_id": id_imovel, "status": {"$ne": "Alugado"}}).update(
+            {"$set": {"status": "Alugado"}},
+            response_type=UpdateResponse.OLD_DOCUMENT,
+        )
+        for id_imovel in candidatos.values()
+    ))
+
+    novos, status_anteriores = {}, {}
+    for (indice, id_imovel), imovel in zip(candidatos.items(), reservas):
+        if not imovel:
+            resultados[indice] = erro_item(indice, 400, MENSAGEM_JA_ALUGADO)
+            continue
+        item = dados[indice]
+        inquilino = inquilinos[PydanticObjectId(item.id_inquilino)]
+        status_anteriores[indice] = imovel.status
+        imovel.status = "Alugado"
+        novos[indice] = Contrato(
+            inquilino=inquilino,
+            imovel=imovel,
+            data_inicio=item.data_inicio,
+            mes_aniversario=item.data_inicio.month,
+            data_fim=item.data_fim,
+            valor_aluguel=item.valor_aluguel,
+            status="Ativo",
+            resumo_imovel=resumos.resumo_imovel(imovel),
+            resumo_inquilino=resumos.resumo_inquilino(inquilino),
         )
+
+    try:
+        resultados.update(await inserir_em_lote(Contrato, novos))
+    except Exception:
+        await _liberar_reservas(candidatos, status_anteriores, novos)
+        raise
+    # Desfazer a reserva dos imóveis cujo contrato não foi gravado
+    await _liberar_reservas(
+        candidatos, status_anteriores, [i for i in novos if resultados[i].status != "criado"]
+    )
+
+    criados = [novos[i] for i in novos if resultados[i].status == "criado"]
+    if novos:
+        await cache_entidades.invalidar(Imovel, *(candidatos[i] for i in novos))
+        await invalidar("contratos", "imoveis")
+    if criados:
+        await estatisticas.registrar_receita(sum(c.valor_aluguel for c in criados))
+    return ordenar_resultados(resultados)
+
+
+@router.post("/batch-get", response_model=list[ResultadoBuscaLote[Contrato]])
+async def buscar_contratos_em_lote(
+    ids: list[str] = Body(max_length=settings.BATCH_GET_MAX_IDS)
+):
+    """
+    Busca vários contratos pelo ID com uma única consulta $in.
     
-    # Validar datas
-    if dados.data_fim <= dados.data_inicio:
+    Args:
+        ids: IDs dos contratos (repetidos são aceitos).
+    
+    Returns:
+        Resultado de cada ID, na ordem enviada: o contrato encontrado, ou a
+        indicação de ID inválido (400) ou não encontrado (404).
+    """
+    return await buscar_em_lote(Contrato, ids, "Contrato não encontrado")
+
+
+@router.post("/vencidos/encerrar", response_model=ExecucaoVencimento)
+async def encerrar_contratos_vencidos():
+    """
+    Dispara agora o encerramento dos contratos ativos com data de fim já passada,
+    o mesmo executado periodicamente pelo agendamento.
+    
+    Os contratos são encerrados em lotes com update_many, os imóveis liberados
+    com um único update por lote e a receita do dashboard ajustada.
+    
+    Returns:
+        Resumo da execução (lotes, contratos encerrados, imóveis liberados).
+    
+    Raises:
+        HTTPException: Se já houver uma execução em andamento neste processo.
+    """
+    if vencimentos.em_andamento():
         raise HTTPException(
-            status_code=400, 
-            detail="A data de fim deve ser posterior à data de início"
+            status_code=409, detail="Já existe um encerramento de contratos vencidos em andamento"
         )
+    return await vencimentos.encerrar_vencidos("manual")
+
+
+@router.get("/vencidos/execucoes", response_model=list[ExecucaoVencimento])
+async def listar_execucoes_vencimento(limit: int = Query(10, ge=1, le=100)):
+    """
+    Lista os resumos das últimas execuções do encerramento de contratos vencidos.
     
-    # Criar contrato
-    novo_contrato = Contrato(
-        inquilino=inquilino,
-        imovel=imovel,
-        data_inicio=dados.data_inicio,
-        data_fim=dados.data_fim,
-        valor_aluguel=dados.valor_aluguel,
-        status="Ativo"
-    )
+    Args:
+        limit: Número máximo de execuções a retornar.
+    
+    Returns:
+        Execuções, da mais recente para a mais antiga.
+    """
+    return await ExecucaoVencimento.find().sort([("inicio", -1)]).limit(limit).to_list()
+
+
+@router.post("/reajuste", response_model=ResultadoReajuste)
+async def reajustar_contratos(dados: ReajusteCreate):
+    """
+    Reajusta pelo índice informado o aluguel de todos os contratos ativos com
+    aniversário no mês, em um único update_many com pipeline no MongoDB.
+    
+    Só entram contratos com pelo menos um ano e ainda não reajustados no ano,
+    então repetir a chamada não reajusta duas vezes. Com simular=true nada é
+    alterado e a resposta traz a quantidade de contratos e a variação da receita.
     
-    # Atualizar status do imóvel para "Alugado"
-    await imovel.set({"status": "Alugado"})
+    Args:
+        dados: Índice, percentual, ano, mês de aniversário e se é só simulação.
     
-    return await novo_contrato.insert()
+    Returns:
+        Quantidade de contratos reajustados e receita antes e depois.
+    """
+    return await reajuste.reajustar(dados)
 
 
 @router.get("/", response_model=list[Contrato])
 async def listar_contratos(
+    response: Response,
     skip: int = Query(0, ge=0), 
     limit: int = Query(10, ge=1, le=100),
-    status: str | None = Query(None, description="Filtrar por status (Ativo, Encerrado, Cancelado)")
+    status: str | None = Query(None, description="Filtrar por status (Ativo, Encerrado, Cancelado)"),
+    cursor: str | None = Query(None, description="Cursor da próxima página (header X-Next-Cursor)"),
+    fields: str | None = Query(None, description=DESCRICAO_FIELDS),
+    expand: str | None = Query(None, description=DESCRICAO_EXPAND),
+    com_total: bool = Query(False, description=DESCRICAO_COM_TOTAL),
+    carregador: CarregadorLinks = Depends(CarregadorLinks)
 ):
     """
     Lista todos os contratos com paginação e filtro opcional por status.
     
     Args:
-        skip: Número de registros a pular.
+        skip: Número de registros a pular (ignorado quando há cursor).
         limit: Número máximo de registros a retornar.
         status: Filtrar por status do contrato.
+        cursor: Token opaco da próxima página, devolvido no header X-Next-Cursor.
+        fields: Campos a retornar (projeção), separados por vírgula.
+        expand: Links a trazer por inteiro (imovel, inquilino), com um $in por coleção.
+        com_total: Se true, responde {items, total} com o total de contratos do filtro.
     
     Returns:
         Lista de contratos.
     """
+    expansao = campos_expansao(Contrato, expand)
+    parcial = modelo_projecao(Contrato, fields, expansao)
+    filtros = {}
     if status:
-        contratos = await Contrato.find(
-            {"status": status}
-        ).skip(skip).limit(limit).to_list()
-    else:
-        contratos = await Contrato.find_all().skip(skip).limit(limit).to_list()
-    
-    return contratos
+        filtros["status"] = status
+    if com_total:
+        documentos, total = await pagina_e_total(
+            Contrato, filtros, ordenacao(), 0 if cursor else skip, limit,
+            filtro_pagina=filtro_cursor(cursor) if cursor else None, parcial=parcial,
+        )
+        definir_proximo_cursor(response, documentos, limit)
+        if expansao:
+            documentos = [(parcial or Contrato).model_validate(d) for d in documentos]
+            await carregador.expandir(documentos, expansao)
+        return resposta_com_total(Contrato, documentos, total, response, parcial)
+    if cursor:
+        filtros.update(filtro_cursor(cursor))
+        skip = 0
+    
+    if settings.SERIALIZACAO_RAPIDA and not parcial and not expansao:
+        documentos = await listar_crus(Contrato, filtros, ordenacao(), skip, limit)
+        definir_proximo_cursor(response, documentos, limit)
+        return resposta_rapida(Contrato, documentos, response)
+    query = Contrato.find(filtros)
+    if parcial:
+        query = query.project(parcial)
+    contratos = await query.sort(ordenacao()).skip(skip).limit(limit).to_list()
+    await carregador.expandir(contratos, expansao)
+    
+    definir_proximo_cursor(response, contratos, limit)
+    return resposta_projetada(contratos, response) if parcial else contratos
 
 
 @router.get("/inquilino/{id_inquilino}", response_model=list[Contrato])
-async def listar_contratos_por_inquilino(id_inquilino: str):
+async def listar_contratos_por_inquilino(
+    id_inquilino: str,
+    fields: str | None = Query(None, description=DESCRICAO_FIELDS),
+    expand: str | None = Query(None, description=DESCRICAO_EXPAND),
+    carregador: CarregadorLinks = Depends(CarregadorLinks)
+):
     """
     Lista todos os contratos de um inquilino específico.
     
     Args:
         id_inquilino: ID do inquilino.
+        fields: Campos a retornar (projeção), separados por vírgula.
+        expand: Links a trazer por inteiro (imovel, inquilino), com um $in por coleção.
     
     Returns:
         Lista de contratos do inquilino.
@@ -122,18 +407,30 @@ async def listar_contratos_por_inquilino(id_inquilino: str):
     if not PydanticObjectId.is_valid(id_inquilino):
         raise HTTPException(status_code=400, detail="ID de inquilino inválido")
     
-    return await Contrato.find(
-        {"inquilino.$id": PydanticObjectId(id_inquilino)}
-    ).to_list()
+    expansao = campos_expansao(Contrato, expand)
+    parcial = modelo_projecao(Contrato, fields, expansao)
+    query = Contrato.find({"inquilino.$id": PydanticObjectId(id_inquilino)})
+    if parcial:
+        query = query.project(parcial)
+    contratos = await query.to_list()
+    await carregador.expandir(contratos, expansao)
+    return resposta_projetada(contratos) if parcial else contratos
 
 
 @router.get("/imovel/{id_imovel}", response_model=list[Contrato])
-async def listar_contratos_por_imovel(id_imovel: str):
+async def listar_contratos_por_imovel(
+    id_imovel: str,
+    fields: str | None = Query(None, description=DESCRICAO_FIELDS),
+    expand: str | None = Query(None, description=DESCRICAO_EXPAND),
+    carregador: CarregadorLinks = Depends(CarregadorLinks)
+):
     """
     Lista todos os contratos de um imóvel específico.
     
     Args:
         id_imovel: ID do imóvel.
+        fields: Campos a retornar (projeção), separados por vírgula.
+        expand: Links a trazer por inteiro (imovel, inquilino), com um $in por coleção.
     
     Returns:
         Lista de contratos do imóvel.
@@ -144,18 +441,31 @@ async def listar_contratos_por_imovel(id_imovel: str):
     if not PydanticObjectId.is_valid(id_imovel):
         raise HTTPException(status_code=400, detail="ID de imóvel inválido")
     
-    return await Contrato.find(
-        {"imovel.$id": PydanticObjectId(id_imovel)}
-    ).to_list()
+    expansao = campos_expansao(Contrato, expand)
+    parcial = modelo_projecao(Contrato, fields, expansao)
+    query = Contrato.find({"imovel.$id": PydanticObjectId(id_imovel)})
+    if parcial:
+        query = query.project(parcial)
+    contratos = await query.to_list()
+    await carregador.expandir(contratos, expansao)
+    return resposta_projetada(contratos) if parcial else contratos
 
 
 @router.get("/{id}", response_model=Contrato)
-async def obter_contrato(id: str):
+async def obter_contrato(
+    id: str,
+    response: Response,
+    fields: str | None = Query(None, description=DESCRICAO_FIELDS),
+    if_none_match: str | None = Header(None)
+):
     """
     Obtém um contrato pelo ID.
+    Devolve o header ETag; com If-None-Match igual a ele, responde 304 sem corpo.
     
     Args:
         id: ID do contrato.
+        fields: Campos a retornar (projeção), separados por vírgula.
+        if_none_match: ETag da versão que o cliente já tem.
     
     Returns:
         Contrato encontrado.
@@ -166,44 +476,84 @@ async def obter_contrato(id: str):
     if not PydanticObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="ID inválido")
     
-    contrato = await Contrato.get(id)
-    if not contrato:
+    parcial = modelo_projecao(Contrato, fields)
+    documento = await ler_cru(Contrato, PydanticObjectId(id), parcial)
+    if not documento:
         raise HTTPException(status_code=404, detail="Contrato não encontrado")
-    return contrato
+    if nao_modificado := responder_nao_modificado(documento, if_none_match, response):
+        return nao_modificado
+    if parcial:
+        return resposta_projetada(parcial.model_validate(documento), response)
+    return Contrato.model_validate(documento)
 
 
 @router.put("/{id}", response_model=Contrato)
-async def atualizar_contrato(id: str, dados: ContratoUpdate):
+async def atualizar_contrato(
+    id: str,
+    dados: ContratoUpdate,
+    response: Response,
+    if_match: str | None = Header(None)
+):
     """
     Atualiza um contrato existente.
     
+    A atualização é feita com um find_one_and_update que devolve o estado anterior,
+    usado para liberar o imóvel e ajustar a receita sem uma leitura separada.
+    Com If-Match, o contrato é lido antes e o update só casa se ele não tiver mudado.
+    
     Args:
         id: ID do contrato.
         dados: Dados a serem atualizados.
+        if_match: ETag lido pelo cliente (controle de concorrência otimista).
     
     Returns:
-        Contrato atualizado.
+        Contrato atualizado (com o novo ETag no header).
     
     Raises:
-        HTTPException: Se o ID for inválido ou contrato não encontrado.
+        HTTPException: Se o ID for inválido, contrato não encontrado ou If-Match não conferir.
     """
     if not PydanticObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="ID inválido")
     
-    contrato = await Contrato.get(id)
-    if not contrato:
-        raise HTTPException(status_code=404, detail="Contrato não encontrado")
-    
+    filtro = {"_id": PydanticObjectId(id)}
     dados_atualizacao = dados.model_dump(exclude_unset=True)
-    
-    # Se estiver encerrando ou cancelando o contrato, liberar o imóvel
-    if dados.status in ["Encerrado", "Cancelado"] and contrato.status == "Ativo":
-        imovel_id = contrato.imovel.ref.id if hasattr(contrato.imovel, 'ref') else contrato.imovel.id
-        imovel = await Imovel.get(imovel_id)
-        if imovel:
-            await imovel.set({"status": "Disponivel"})
-    
-    await contrato.set(dados_atualizacao)
+    if dados.data_inicio is not None:
+        dados_atualizacao["mes_aniversario"] = dados.data_inicio.month
+    if if_match is not None or not dados_atualizacao:
+        documento = await ler_cru(Contrato, filtro["_id"])
+        if not documento:
+            raise HTTPException(status_code=404, detail="Contrato não encontrado")
+        filtro.update(verificar_if_match(documento, if_match))
+        if not dados_atualizacao:
+            response.headers["ETag"] = etag(documento)
+            return Contrato.model_validate(documento)
+    
+    async with transacao() as sessao:
+        documento = await Contrato.get_motor_collection().find_one_and_update(
+            filtro,
+            {"$set": Encoder().encode(dados_atualizacao)},
+            return_document=ReturnDocument.BEFORE,
+            session=sessao,
+        )
+        if not documento:
+            if if_match is not None:
+                raise HTTPException(status_code=412, detail=MENSAGEM_PRECONDICAO)
+            raise HTTPException(status_code=404, detail="Contrato não encontrado")
+        atualizado = aplicar_set(documento, dados_atualizacao)
+        anterior = Contrato.model_validate(documento)
+        contrato = Contrato.model_validate(atualizado)
+        
+        # Se estiver encerrando ou cancelando o contrato, liberar o imóvel
+        if contrato.status in ["Encerrado", "Cancelado"] and anterior.status == "Ativo":
+            await _liberar_imovel(anterior, sessao)
+    
+    receita_anterior = anterior.valor_aluguel if anterior.status == "Ativo" else 0.0
+    receita_atual = contrato.valor_aluguel if contrato.status == "Ativo" else 0.0
+    await estatisticas.registrar_receita(receita_atual - receita_anterior)
+    if contrato.status in ["Encerrado", "Cancelado"] and anterior.status == "Ativo":
+        await cache_entidades.invalidar(Imovel, _id_imovel(anterior))
+    await invalidar("contratos", "imoveis")
+    response.headers["ETag"] = etag(atualizado)
     return contrato
 
 
@@ -213,6 +563,9 @@ async def deletar_contrato(id: str):
     Remove um contrato do sistema.
     Se o contrato estiver ativo, libera o imóvel.
     
+    O contrato é removido com find_one_and_delete, que já devolve o documento
+    apagado, e o imóvel é liberado com um único update.
+    
     Args:
         id: ID do contrato.
     
@@ -225,18 +578,22 @@ async def deletar_contrato(id: str):
     if not PydanticObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="ID inválido")
     
-    contrato = await Contrato.get(id)
-    if not contrato:
-        raise HTTPException(status_code=404, detail="Contrato não encontrado")
+    async with transacao() as sessao:
+        documento = await Contrato.get_motor_collection().find_one_and_delete(
+            {"_id": PydanticObjectId(id)}, session=sessao
+        )
+        if not documento:
+            raise HTTPException(status_code=404, detail="Contrato não encontrado")
+        contrato = Contrato.model_validate(documento)
+        
+        # Se contrato ativo, liberar o imóvel
+        if contrato.status == "Ativo":
+            await _liberar_imovel(contrato, sessao)
     
-    # Se contrato ativo, liberar o imóvel
     if contrato.status == "Ativo":
-        imovel_id = contrato.imovel.ref.id if hasattr(contrato.imovel, 'ref') else contrato.imovel.id
-        imovel = await Imovel.get(imovel_id)
-        if imovel:
-            await imovel.set({"status": "Disponivel"})
-    
-    await contrato.delete()
+        await estatisticas.registrar_receita(-contrato.valor_aluguel)
+        await cache_entidades.invalidar(Imovel, _id_imovel(contrato))
+    await invalidar("contratos", "imoveis")
     return {"message": "Contrato deletado com sucesso"}
 
 
@@ -245,6 +602,9 @@ async def encerrar_contrato(id: str):
     """
     Encerra um contrato ativo e libera o imóvel.
     
+    A troca de status só casa com contratos ativos, então dois encerramentos
+    simultâneos não liberam o imóvel nem descontam a receita duas vezes.
+    
     Args:
         id: ID do contrato.
     
@@ -257,19 +617,37 @@ async def encerrar_contrato(id: str):
     if not PydanticObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="ID inválido")
     
-    contrato = await Contrato.get(id)
-    if not contrato:
-        raise HTTPException(status_code=404, detail="Contrato não encontrado")
+    async with transacao() as sessao:
+        contrato = await Contrato.find_one(
+            {"_id": PydanticObjectId(id), "status": "Ativo"}
+        ).update(
+            {"$set": {"status": "Encerrado"}},
+            session=sessao,
+            response_type=UpdateResponse.NEW_DOCUMENT,
+        )
+        if contrato:
+            await _liberar_imovel(contrato, sessao)
     
-    if contrato.status != "Ativo":
+    if not contrato:
+        if not await Contrato.get(id):
+            raise HTTPException(status_code=404, detail="Contrato não encontrado")
         raise HTTPException(status_code=400, detail="Este contrato já foi encerrado ou cancelado")
     
-    # Liberar o imóvel
-    imovel_id = contrato.imovel.ref.id if hasattr(contrato.imovel, 'ref') else contrato.imovel.id
-    imovel = await Imovel.get(imovel_id)
-    if imovel:
-        await imovel.set({"status": "Disponivel"})
-    
-    # Encerrar contrato
-    await contrato.set({"status": "Encerrado"})
+    await estatisticas.registrar_receita(-contrato.valor_aluguel)
+    await cache_entidades.invalidar(Imovel, _id_imovel(contrato))
+    await invalidar("contratos", "imoveis")
     return contrato
+
+
+def _id_imovel(contrato: Contrato) -> PydanticObjectId:
+    return contrato.imovel.ref.id if hasattr(contrato.imovel, 'ref') else contrato.imovel.id
+
+
+async def _liberar_imovel(contrato: Contrato, sessao=None) -> None:
+    """
+    Marca o imóvel do contrato como disponível, sem buscá-lo antes.
+    Quem chama invalida o imóvel no cache_entidades depois da transação.
+    """
+    await Imovel.find_one({"_id": _id_imovel(contrato)}).update(
+        {"$set": {"status": "Disponivel"}}, session=sessao
+    )
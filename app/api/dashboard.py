@@ -1,77 +1,170 @@
-from fastapi import APIRouter
+import json
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from app.core.cache import cache, cache_resposta, invalidar
+from app.core.cache_entidades import cache_entidades
 from app.models.imovel import Imovel
 from app.models.contrato import Contrato
 from app.models.proprietario import Proprietario
 from app.models.inquilino import Inquilino
+from app.services import estatisticas
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard e Agregações"])
 
+# Quantidade de proprietários trazida por lote do cursor no modo NDJSON
+NDJSON_BATCH_SIZE = 50
+
 
 @router.get("/estatisticas")
+@cache_resposta("imoveis", "contratos", "estatisticas")
 async def get_estatisticas():
     """
-    Retorna estatísticas agregadas usando Aggregation Pipeline do MongoDB via Beanie.
+    Retorna as estatísticas do dashboard a partir dos contadores materializados.
+    Os contadores são mantidos com $inc pelas rotas de escrita e recalculados com
+    aggregation pipeline apenas na reconciliação (ver app/services/estatisticas.py).
     Requisito: e) Agregações e contagens utilizando aggregation pipeline
     """
+    dados = await estatisticas.obter_estatisticas()
 
-    # 1. Agregação: Quantidade de imóveis por tipo
-    # Sintaxe nativa do Beanie: Model.aggregate(pipeline).to_list()
-    pipeline_imoveis = [
-        {"$group": {"_id": "$tipo_imovel", "quantidade": {"$sum": 1}}}
-    ]
+    return {
+        "imoveis_por_categoria": [
+            {"_id": tipo, "quantidade": quantidade}
+            for tipo, quantidade in dados.quantidades_por_tipo().items()
+            if quantidade > 0
+        ],
+        "receita_mensal_atual": dados.receita_mensal_atual
+    }
 
-    # Com o motor<3.7, o 'await' aqui volta a funcionar corretamente
-    qtd_por_tipo = await Imovel.aggregate(pipeline_imoveis).to_list()
 
-    # 2. Agregação: Receita Total (Soma de valor_aluguel onde status='Ativo')
-    pipeline_receita = [
-        {"$match": {"status": "Ativo"}},
-        {"$group": {"_id": None, "receita_total": {"$sum": "$valor_aluguel"}}}
-    ]
+@router.post("/estatisticas/reconciliar")
+async def reconciliar_estatisticas():
+    """Reconstrói os contadores do zero e informa a divergência encontrada."""
+    relatorio = await estatisticas.reconciliar()
+    await invalidar("estatisticas")
+    return relatorio
 
-    resultado_receita = await Contrato.aggregate(pipeline_receita).to_list()
 
-    # Tratamento para caso não haja contratos (lista vazia)
-    receita_total = resultado_receita[0]["receita_total"] if resultado_receita else 0.0
+@router.get("/cache")
+async def get_estatisticas_cache():
+    """Acertos, falhas e tamanho do cache de respostas, para dimensionar o TTL e o limite."""
+    return await cache.estatisticas()
 
-    return {
-        "imoveis_por_categoria": qtd_por_tipo,
-        "receita_mensal_atual": receita_total
+
+@router.get("/cache/entidades")
+async def get_estatisticas_cache_entidades():
+    """Tamanho e acertos/falhas por coleção do cache de leitura por id das entidades."""
+    return await cache_entidades.estatisticas()
+
+
+def _pipeline_dashboard_completo() -> list[dict]:
+    """
+    Monta o pipeline do relatório completo: Proprietário -> Imóveis -> Contrato ativo -> Inquilino.
+    Todo o cruzamento é feito no servidor com $lookup, em uma única ida ao banco.
+    """
+    lookup_inquilino = {
+        "$lookup": {
+            "from": Inquilino.Settings.name,
+            "localField": "inquilino.$id",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"nome": 1}}],
+            "as": "inquilino",
+        }
     }
-@router.get("/completo")
-async def get_dashboard_completo():
-    proprietarios = await Proprietario.find_all().to_list()
-    relatorio = []
-    
-    for prop in proprietarios:
-        imoveis = await Imovel.find(Imovel.proprietario.id == prop.id).to_list()
-        dados_prop = {
-            "proprietario": prop.nome,
-            "email": prop.email,
-            "total_imoveis": len(imoveis),
-            "imoveis": []
+    lookup_contrato_ativo = {
+        "$lookup": {
+            "from": Contrato.Settings.name,
+            "localField": "_id",
+            "foreignField": "imovel.$id",
+            "pipeline": [
+                {"$match": {"status": "Ativo"}},
+                {"$limit": 1},
+                lookup_inquilino,
+                {"$project": {
+                    "valor_aluguel": 1,
+                    "data_fim": 1,
+                    "inquilino": {"$ifNull": [{"$first": "$inquilino.nome"}, "N/A"]},
+                }},
+            ],
+            "as": "contrato",
         }
-        
-        for imovel in imoveis:
-            contrato = await Contrato.find_one(
-                Contrato.imovel.id == imovel.id,
-                Contrato.status == "Ativo",
-                fetch_links=True 
-            )
-            
-            info_imovel = {
-                "apelido": imovel.apelido_imovel,
-                "tipo": imovel.tipo_imovel,
-                "endereco": imovel.endereco,
-                "status": "Alugado" if contrato else "Disponivel",
-                "valor_atual": contrato.valor_aluguel if contrato else imovel.valor_aluguel_base
+    }
+    tem_contrato = {"$gt": [{"$size": "$contrato"}, 0]}
+    formatar_imovel = {
+        "$replaceWith": {
+            "$mergeObjects": [
+                {
+                    "apelido": "$apelido_imovel",
+                    "tipo": "$tipo_imovel",
+                    "endereco": "$endereco",
+                    "status": {"$cond": [tem_contrato, "Alugado", "Disponivel"]},
+                    "valor_atual": {"$cond": [
+                        tem_contrato,
+                        {"$first": "$contrato.valor_aluguel"},
+                        "$valor_aluguel_base",
+                    ]},
+                },
+                {"$cond": [
+                    tem_contrato,
+                    {
+                        "inquilino": {"$first": "$contrato.inquilino"},
+                        "vencimento": {"$dateToString": {
+                            "format": "%Y-%m-%d",
+                            "date": {"$first": "$contrato.data_fim"},
+                        }},
+                    },
+                    {},
+                ]},
+            ]
+        }
+    }
+
+    return [
+        {
+            "$lookup": {
+                "from": Imovel.Settings.name,
+                "localField": "_id",
+                "foreignField": "proprietario.$id",
+                "pipeline": [lookup_contrato_ativo, formatar_imovel],
+                "as": "imoveis",
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "proprietario": "$nome",
+                "email": {"$ifNull": ["$email", None]},
+                "total_imoveis": {"$size": "$imoveis"},
+                "imoveis": "$imoveis",
             }
+        },
+    ]
 
-            if contrato:
-                info_imovel["inquilino"] = contrato.inquilino.nome if contrato.inquilino else "N/A"
-                info_imovel["vencimento"] = contrato.data_fim
-            
-            dados_prop["imoveis"].append(info_imovel)
-        relatorio.append(dados_prop)
 
-    return relatorio
\ No newline at end of file
+async def _stream_dashboard_completo():
+    """Emite um bloco de proprietário por linha (NDJSON), consumindo o cursor em lotes."""
+    cursor = Proprietario.aggregate(
+        _pipeline_dashboard_completo(),
+        batchSize=NDJSON_BATCH_SIZE,
+    )
+    async for bloco in cursor:
+        yield json.dumps(bloco, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+@router.get("/completo")
+@cache_resposta("proprietarios", "imoveis", "contratos", "inquilinos")
+async def get_dashboard_completo(
+    formato: str = Query("json", enum=["json", "ndjson"])
+):
+    """
+    Relatório completo de cada proprietário com seus imóveis, contrato ativo e inquilino.
+    Resolvido por um único aggregation pipeline com $lookup aninhados (sem N+1 consultas).
+
+    Com formato=ndjson a resposta é transmitida em streaming, um proprietário por linha,
+    sem montar o relatório inteiro em memória.
+    """
+    if formato == "ndjson":
+        return StreamingResponse(
+            _stream_dashboard_completo(),
+            media_type="application/x-ndjson",
+        )
+    return await Proprietario.aggregate(_pipeline_dashboard_completo()).to_list()
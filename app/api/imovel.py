@@ -1,7 +1,20 @@
+import re
+from collections import Counter
 from beanie import PydanticObjectId
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Body, Header, HTTPException, Query, Response
+from app.core.cache import invalidar
+from app.core.cache_entidades import cache_entidades
+from app.core.contagem import DESCRICAO_COM_TOTAL, pagina_e_total, resposta_com_total
+from app.core.config import settings
+from app.core.etag import atualizar_documento, ler_cru, responder_nao_modificado
+from app.core.lote import buscar_em_lote, erro_item, inserir_em_lote, ordenar_resultados
+from app.core.paginacao import definir_proximo_cursor, filtro_cursor, ordenacao
+from app.core.projecao import DESCRICAO_FIELDS, modelo_projecao, resposta_projetada
+from app.core.serializacao import listar_crus, resposta_rapida
 from app.models.imovel import Imovel, ImovelCreate, ImovelUpdate
+from app.models.lote import ResultadoBuscaLote, ResultadoItemLote
 from app.models.proprietario import Proprietario
+from app.services import estatisticas, resumos
 
 router = APIRouter(prefix="/imoveis", tags=["Imóveis"])
 
@@ -23,68 +36,202 @@ async def criar_imovel(dados: ImovelCreate):
     if not PydanticObjectId.is_valid(dados.id_proprietario):
         raise HTTPException(status_code=400, detail="ID de proprietário inválido")
 
-    prop = await Proprietario.get(dados.id_proprietario)
-    if not prop:
+    documento = await cache_entidades.obter(Proprietario, PydanticObjectId(dados.id_proprietario))
+    if not documento:
         raise HTTPException(status_code=404, detail="Proprietário não encontrado")
+    prop = Proprietario.model_validate(documento)
 
     novo_imovel = Imovel(
         **dados.model_dump(exclude={"id_proprietario"}),
         proprietario=prop
     )
 
-    return await novo_imovel.insert()
+    await novo_imovel.insert()
+    await estatisticas.registrar_imovel(novo_imovel.tipo_imovel)
+    await invalidar("imoveis")
+    return novo_imovel
+
+
+@router.post("/bulk", response_model=list[ResultadoItemLote])
+async def criar_imoveis_em_lote(
+    dados: list[ImovelCreate] = Body(max_length=settings.BULK_MAX_ITENS)
+):
+    """
+    Cria vários imóveis de uma vez.
+    Os proprietários são buscados com uma única consulta $in e os imóveis
+    gravados com um insert_many não ordenado.
+    
+    Args:
+        dados: Lista de imóveis, cada um com o ID do seu proprietário.
+    
+    Returns:
+        Resultado de cada item, na ordem enviada (criado com id, ou erro com o motivo).
+    """
+    resultados = {}
+    ids_proprietarios = set()
+    for indice, item in enumerate(dados):
+        if not PydanticObjectId.is_valid(item.id_proprietario):
+            resultados[indice] = erro_item(indice, 400, "ID de proprietário inválido")
+        else:
+            ids_proprietarios.add(PydanticObjectId(item.id_proprietario))
+
+    proprietarios = {
+        prop.id: prop
+        for prop in await Proprietario.find({"_id": {"$in": list(ids_proprietarios)}}).to_list()
+    }
+
+    novos = {}
+    for indice, item in enumerate(dados):
+        if indice in resultados:
+            continue
+        prop = proprietarios.get(PydanticObjectId(item.id_proprietario))
+        if not prop:
+            resultados[indice] = erro_item(indice, 404, "Proprietário não encontrado")
+            continue
+        novos[indice] = Imovel(
+            **item.model_dump(exclude={"id_proprietario"}),
+            proprietario=prop
+        )
+
+    resultados.update(await inserir_em_lote(Imovel, novos))
+
+    criados = [novos[i] for i, r in resultados.items() if r.status == "criado"]
+    if criados:
+        await estatisticas.registrar_imoveis(Counter(imovel.tipo_imovel for imovel in criados))
+        await invalidar("imoveis")
+    return ordenar_resultados(resultados)
+
+
+@router.post("/batch-get", response_model=list[ResultadoBuscaLote[Imovel]])
+async def buscar_imoveis_em_lote(
+    ids: list[str] = Body(max_length=settings.BATCH_GET_MAX_IDS)
+):
+    """
+    Busca vários imóveis pelo ID com uma única consulta $in.
+    
+    Args:
+        ids: IDs dos imóveis (repetidos são aceitos).
+    
+    Returns:
+        Resultado de cada ID, na ordem enviada: o imóvel encontrado, ou a
+        indicação de ID inválido (400) ou não encontrado (404).
+    """
+    return await buscar_em_lote(Imovel, ids, "Imóvel não encontrado")
 
 
 @router.get("/", response_model=list[Imovel])
-async def listar_imoveis(skip: int = Query(0), limit: int = Query(10)):
-    """Lista todos os imóveis com paginação."""
-    return await Imovel.find_all().skip(skip).limit(limit).to_list()
+async def listar_imoveis(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: str | None = Query(None, description="Cursor da próxima página (header X-Next-Cursor)"),
+    fields: str | None = Query(None, description=DESCRICAO_FIELDS),
+    com_total: bool = Query(False, description=DESCRICAO_COM_TOTAL)
+):
+    """
+    Lista todos os imóveis com paginação.
+    Com cursor, a página é buscada por keyset (_id) e o skip é ignorado.
+    Com fields, só os campos pedidos são lidos do banco e retornados.
+    Com com_total, responde {items, total}.
+    """
+    parcial = modelo_projecao(Imovel, fields)
+    filtros = {}
+    if cursor:
+        filtros = filtro_cursor(cursor)
+        skip = 0
+    if com_total:
+        documentos, total = await pagina_e_total(
+            Imovel, {}, ordenacao(), skip, limit, filtro_pagina=filtros, parcial=parcial
+        )
+        definir_proximo_cursor(response, documentos, limit)
+        return resposta_com_total(Imovel, documentos, total, response, parcial)
+    if settings.SERIALIZACAO_RAPIDA and not parcial:
+        documentos = await listar_crus(Imovel, filtros, ordenacao(), skip, limit)
+        definir_proximo_cursor(response, documentos, limit)
+        return resposta_rapida(Imovel, documentos, response)
+    query = Imovel.find(filtros).skip(skip)
+    if parcial:
+        query = query.project(parcial)
+    imoveis = await query.sort(ordenacao()).limit(limit).to_list()
+    definir_proximo_cursor(response, imoveis, limit)
+    return resposta_projetada(imoveis, response) if parcial else imoveis
 
 
 @router.get("/buscar", response_model=list[Imovel])
 async def buscar_imoveis(
+    termo: str | None = Query(None, description="Busca por palavras no apelido, endereço e descrição (índice de texto)"),
     apelido: str | None = Query(None, description="Busca parcial por apelido (case-insensitive)"),
     descricao: str | None = Query(None, description="Busca parcial na descrição (case-insensitive)"),
     tipo: str | None = Query(None, description="Filtrar por tipo de imóvel"),
-    status: str | None = Query(None, description="Filtrar por status (Disponivel, Alugado)")
+    status: str | None = Query(None, description="Filtrar por status (Disponivel, Alugado)"),
+    fields: str | None = Query(None, description=DESCRICAO_FIELDS),
+    skip: int = Query(0, ge=0),
+    limit: int | None = Query(
+        None, ge=1, le=100, description="Máximo de imóveis (todos, se omitido; 10 com com_total)"
+    ),
+    com_total: bool = Query(False, description=DESCRICAO_COM_TOTAL)
 ):
     """
-    Busca imóveis por apelido, descrição, tipo ou status.
-    Implementa busca por texto parcial e case-insensitive.
+    Busca imóveis por termo, apelido, descrição, tipo ou status.
+    O termo usa o índice de texto; apelido e descrição fazem busca parcial e case-insensitive,
+    tratando o texto informado como literal (sem interpretar expressões regulares).
     
     Args:
+        termo: Palavras buscadas no índice de texto.
         apelido: Texto para busca parcial no apelido.
         descricao: Texto para busca parcial na descrição.
         tipo: Tipo de imóvel (Casa, Apartamento, etc).
         status: Status do imóvel (Disponivel, Alugado).
+        fields: Campos a retornar (projeção), separados por vírgula.
+        skip: Número de imóveis a pular (com skip ou limit, a ordem é por _id).
+        limit: Número máximo de imóveis a retornar (com com_total, 10 se omitido,
+            para a página caber no documento do $facet).
+        com_total: Se true, responde {items, total} com o total de imóveis encontrados.
     
     Returns:
         Lista de imóveis que correspondem aos critérios.
     """
+    parcial = modelo_projecao(Imovel, fields)
     filtros = {}
     
+    if termo:
+        filtros["$text"] = {"$search": termo}
     if apelido:
-        filtros["apelido_imovel"] = {"$regex": apelido, "$options": "i"}
+        filtros["apelido_imovel"] = {"$regex": re.escape(apelido), "$options": "i"}
     if descricao:
-        filtros["descricao"] = {"$regex": descricao, "$options": "i"}
+        filtros["descricao"] = {"$regex": re.escape(descricao), "$options": "i"}
     if tipo:
         filtros["tipo_imovel"] = tipo
     if status:
         filtros["status"] = status
     
     if not filtros:
-        return []
+        return resposta_com_total(Imovel, [], 0) if com_total else []
     
-    return await Imovel.find(filtros).to_list()
+    if com_total:
+        documentos, total = await pagina_e_total(
+            Imovel, filtros, ordenacao(), skip, limit or 10, parcial=parcial
+        )
+        return resposta_com_total(Imovel, documentos, total, parcial=parcial)
+    query = Imovel.find(filtros)
+    if skip or limit:
+        query = query.sort(ordenacao()).skip(skip).limit(limit)
+    if parcial:
+        return resposta_projetada(await query.project(parcial).to_list())
+    return await query.to_list()
 
 
 @router.get("/proprietario/{id_proprietario}", response_model=list[Imovel])
-async def listar_imoveis_por_proprietario(id_proprietario: str):
+async def listar_imoveis_por_proprietario(
+    id_proprietario: str,
+    fields: str | None = Query(None, description=DESCRICAO_FIELDS)
+):
     """
     Lista todos os imóveis de um proprietário específico.
     
     Args:
         id_proprietario: ID do proprietário.
+        fields: Campos a retornar (projeção), separados por vírgula.
     
     Returns:
         Lista de imóveis do proprietário.
@@ -95,18 +242,28 @@ async def listar_imoveis_por_proprietario(id_proprietario: str):
     if not PydanticObjectId.is_valid(id_proprietario):
         raise HTTPException(status_code=400, detail="ID de proprietário inválido")
     
-    return await Imovel.find(
-        {"proprietario.$id": PydanticObjectId(id_proprietario)}
-    ).to_list()
+    parcial = modelo_projecao(Imovel, fields)
+    query = Imovel.find({"proprietario.$id": PydanticObjectId(id_proprietario)})
+    if parcial:
+        return resposta_projetada(await query.project(parcial).to_list())
+    return await query.to_list()
 
 
 @router.get("/{id}", response_model=Imovel)
-async def obter_imovel(id: str):
+async def obter_imovel(
+    id: str,
+    response: Response,
+    fields: str | None = Query(None, description=DESCRICAO_FIELDS),
+    if_none_match: str | None = Header(None)
+):
     """
     Obtém um imóvel pelo ID.
+    Devolve o header ETag; com If-None-Match igual a ele, responde 304 sem corpo.
     
     Args:
         id: ID do imóvel.
+        fields: Campos a retornar (projeção), separados por vírgula.
+        if_none_match: ETag da versão que o cliente já tem.
     
     Returns:
         Imóvel encontrado.
@@ -117,35 +274,55 @@ async def obter_imovel(id: str):
     if not PydanticObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="ID inválido")
 
-    imovel = await Imovel.get(id)
-    if not imovel:
+    parcial = modelo_projecao(Imovel, fields)
+    documento = await ler_cru(Imovel, PydanticObjectId(id), parcial)
+    if not documento:
         raise HTTPException(status_code=404, detail="Imóvel não encontrado")
-    return imovel
+    if nao_modificado := responder_nao_modificado(documento, if_none_match, response):
+        return nao_modificado
+    if parcial:
+        return resposta_projetada(parcial.model_validate(documento), response)
+    return Imovel.model_validate(documento)
 
 
 @router.put("/{id}", response_model=Imovel)
-async def atualizar_imovel(id: str, dados: ImovelUpdate):
+async def atualizar_imovel(
+    id: str,
+    dados: ImovelUpdate,
+    response: Response,
+    tarefas: BackgroundTasks,
+    if_match: str | None = Header(None)
+):
     """
     Atualiza um imóvel existente.
+    Se apelido, tipo ou endereço mudarem, o resumo do imóvel nos contratos é
+    atualizado em segundo plano, depois da resposta.
     
     Args:
         id: ID do imóvel.
         dados: Dados a serem atualizados.
+        if_match: ETag lido pelo cliente; se informado, só atualiza se o imóvel não mudou.
     
     Returns:
-        Imóvel atualizado.
+        Imóvel atualizado (com o novo ETag no header).
     
     Raises:
-        HTTPException: Se o ID for inválido ou imóvel não encontrado.
+        HTTPException: Se o ID for inválido, imóvel não encontrado ou If-Match não conferir.
     """
     if not PydanticObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="ID inválido")
 
-    imovel = await Imovel.get(id)
-    if not imovel:
-        raise HTTPException(status_code=404, detail="Imóvel não encontrado")
-
-    await imovel.set(dados.model_dump(exclude_unset=True))
+    anterior, imovel = await atualizar_documento(
+        Imovel, PydanticObjectId(id), dados.model_dump(exclude_unset=True),
+        if_match, response, "Imóvel não encontrado",
+    )
+    if imovel.tipo_imovel != anterior.tipo_imovel:
+        await estatisticas.registrar_imovel(anterior.tipo_imovel, -1)
+        await estatisticas.registrar_imovel(imovel.tipo_imovel)
+    if resumos.mudou(resumos.CAMPOS_IMOVEL, anterior, imovel):
+        tarefas.add_task(resumos.propagar_imovel, imovel.id)
+    await cache_entidades.invalidar(Imovel, imovel.id)
+    await invalidar("imoveis")
     return imovel
 
 
@@ -171,4 +348,7 @@ async def deletar_imovel(id: str):
         raise HTTPException(status_code=404, detail="Imóvel não encontrado")
 
     await imovel.delete()
+    await estatisticas.registrar_imovel(imovel.tipo_imovel, -1)
+    await cache_entidades.invalidar(Imovel, imovel.id)
+    await invalidar("imoveis")
     return {"message": "Imóvel deletado com sucesso"}
\ No newline at end of file
@@ -1,9 +1,22 @@
 """
 Rotas da API para gerenciamento de Inquilinos.
 """
+import re
 from beanie import PydanticObjectId
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Body, Header, HTTPException, Query, Response
+from pymongo.errors import DuplicateKeyError
+from app.core.cache import invalidar
+from app.core.cache_entidades import cache_entidades
+from app.core.contagem import DESCRICAO_COM_TOTAL, pagina_e_total, resposta_com_total
+from app.core.config import settings
+from app.core.etag import atualizar_documento, ler_cru, responder_nao_modificado
+from app.core.lote import buscar_em_lote, inserir_em_lote, ordenar_resultados
+from app.core.paginacao import definir_proximo_cursor, filtro_cursor, ordenacao
+from app.core.projecao import DESCRICAO_FIELDS, modelo_projecao, resposta_projetada
+from app.core.serializacao import listar_crus, resposta_rapida
 from app.models.inquilino import Inquilino, InquilinoCreate, InquilinoUpdate
+from app.models.lote import ResultadoBuscaLote, ResultadoItemLote
+from app.services import resumos
 
 router = APIRouter(prefix="/inquilinos", tags=["Inquilinos"])
 
@@ -18,30 +31,106 @@ async def criar_inquilino(dados: InquilinoCreate):
     
     Returns:
         Inquilino criado com ID gerado.
+    
+    Raises:
+        HTTPException: Se já existir inquilino com o mesmo CPF.
     """
     novo_inquilino = Inquilino(**dados.model_dump())
-    return await novo_inquilino.insert()
+    try:
+        await novo_inquilino.insert()
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Já existe um inquilino com este CPF")
+    return novo_inquilino
+
+
+@router.post("/bulk", response_model=list[ResultadoItemLote])
+async def criar_inquilinos_em_lote(
+    dados: list[InquilinoCreate] = Body(max_length=settings.BULK_MAX_ITENS)
+):
+    """
+    Cria vários inquilinos com um único insert_many não ordenado.
+    Itens com CPF já cadastrado falham individualmente sem impedir os demais.
+    
+    Args:
+        dados: Lista de inquilinos a criar.
+    
+    Returns:
+        Resultado de cada item, na ordem enviada (criado com id, ou erro com o motivo).
+    """
+    novos = {indice: Inquilino(**item.model_dump()) for indice, item in enumerate(dados)}
+    resultados = await inserir_em_lote(
+        Inquilino, novos, mensagem_duplicado="Já existe um inquilino com este CPF"
+    )
+    return ordenar_resultados(resultados)
+
+
+@router.post("/batch-get", response_model=list[ResultadoBuscaLote[Inquilino]])
+async def buscar_inquilinos_em_lote(
+    ids: list[str] = Body(max_length=settings.BATCH_GET_MAX_IDS)
+):
+    """
+    Busca vários inquilinos pelo ID com uma única consulta $in.
+    
+    Args:
+        ids: IDs dos inquilinos (repetidos são aceitos).
+    
+    Returns:
+        Resultado de cada ID, na ordem enviada: o inquilino encontrado, ou a
+        indicação de ID inválido (400) ou não encontrado (404).
+    """
+    return await buscar_em_lote(Inquilino, ids, "Inquilino não encontrado")
 
 
 @router.get("/", response_model=list[Inquilino])
-async def listar_inquilinos(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100)):
+async def listar_inquilinos(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: str | None = Query(None, description="Cursor da próxima página (header X-Next-Cursor)"),
+    fields: str | None = Query(None, description=DESCRICAO_FIELDS),
+    com_total: bool = Query(False, description=DESCRICAO_COM_TOTAL)
+):
     """
     Lista todos os inquilinos com paginação.
     
     Args:
-        skip: Número de registros a pular.
+        skip: Número de registros a pular (ignorado quando há cursor).
         limit: Número máximo de registros a retornar.
+        cursor: Token opaco da próxima página, devolvido no header X-Next-Cursor.
+        fields: Campos a retornar (projeção), separados por vírgula.
+        com_total: Se true, responde {items, total} com o total de inquilinos.
     
     Returns:
         Lista de inquilinos.
     """
-    return await Inquilino.find_all().skip(skip).limit(limit).to_list()
+    parcial = modelo_projecao(Inquilino, fields)
+    filtros = {}
+    if cursor:
+        filtros = filtro_cursor(cursor)
+        skip = 0
+    if com_total:
+        documentos, total = await pagina_e_total(
+            Inquilino, {}, ordenacao(), skip, limit, filtro_pagina=filtros, parcial=parcial
+        )
+        definir_proximo_cursor(response, documentos, limit)
+        return resposta_com_total(Inquilino, documentos, total, response, parcial)
+    if settings.SERIALIZACAO_RAPIDA and not parcial:
+        documentos = await listar_crus(Inquilino, filtros, ordenacao(), skip, limit)
+        definir_proximo_cursor(response, documentos, limit)
+        return resposta_rapida(Inquilino, documentos, response)
+    query = Inquilino.find(filtros).skip(skip)
+    if parcial:
+        query = query.project(parcial)
+    inquilinos = await query.sort(ordenacao()).limit(limit).to_list()
+    definir_proximo_cursor(response, inquilinos, limit)
+    return resposta_projetada(inquilinos, response) if parcial else inquilinos
 
 
 @router.get("/buscar", response_model=list[Inquilino])
 async def buscar_inquilinos(
     nome: str | None = Query(None, description="Busca parcial por nome"),
-    cpf: str | None = Query(None, description="Busca por CPF")
+    cpf: str | None = Query(None, description="Busca por CPF"),
+    fields: str | None = Query(None, description=DESCRICAO_FIELDS)
 ):
     """
     Busca inquilinos por nome (parcial, case-insensitive) ou CPF.
@@ -49,26 +138,38 @@ async def buscar_inquilinos(
     Args:
         nome: Nome para busca parcial.
         cpf: CPF para busca exata.
+        fields: Campos a retornar (projeção), separados por vírgula.
     
     Returns:
         Lista de inquilinos encontrados.
     """
+    parcial = modelo_projecao(Inquilino, fields)
     if nome:
-        return await Inquilino.find(
-            {"nome": {"$regex": nome, "$options": "i"}}
-        ).to_list()
-    if cpf:
-        return await Inquilino.find({"cpf": cpf}).to_list()
-    return []
+        query = Inquilino.find({"nome": {"$regex": re.escape(nome), "$options": "i"}})
+    elif cpf:
+        query = Inquilino.find({"cpf": cpf})
+    else:
+        return []
+    if parcial:
+        return resposta_projetada(await query.project(parcial).to_list())
+    return await query.to_list()
 
 
 @router.get("/{id}", response_model=Inquilino)
-async def obter_inquilino(id: str):
+async def obter_inquilino(
+    id: str,
+    response: Response,
+    fields: str | None = Query(None, description=DESCRICAO_FIELDS),
+    if_none_match: str | None = Header(None)
+):
     """
     Obtém um inquilino pelo ID.
+    Devolve o header ETag; com If-None-Match igual a ele, responde 304 sem corpo.
     
     Args:
         id: ID do inquilino.
+        fields: Campos a retornar (projeção), separados por vírgula.
+        if_none_match: ETag da versão que o cliente já tem.
     
     Returns:
         Inquilino encontrado.
@@ -79,35 +180,56 @@ async def obter_inquilino(id: str):
     if not PydanticObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="ID inválido")
     
-    inquilino = await Inquilino.get(id)
-    if not inquilino:
+    parcial = modelo_projecao(Inquilino, fields)
+    documento = await ler_cru(Inquilino, PydanticObjectId(id), parcial)
+    if not documento:
         raise HTTPException(status_code=404, detail="Inquilino não encontrado")
-    return inquilino
+    if nao_modificado := responder_nao_modificado(documento, if_none_match, response):
+        return nao_modificado
+    if parcial:
+        return resposta_projetada(parcial.model_validate(documento), response)
+    return Inquilino.model_validate(documento)
 
 
 @router.put("/{id}", response_model=Inquilino)
-async def atualizar_inquilino(id: str, dados: InquilinoUpdate):
+async def atualizar_inquilino(
+    id: str,
+    dados: InquilinoUpdate,
+    response: Response,
+    tarefas: BackgroundTasks,
+    if_match: str | None = Header(None)
+):
     """
     Atualiza um inquilino existente.
+    Se o nome mudar, o resumo do inquilino nos contratos é atualizado em
+    segundo plano, depois da resposta.
     
     Args:
         id: ID do inquilino.
         dados: Dados a serem atualizados.
+        if_match: ETag lido pelo cliente; se informado, só atualiza se o inquilino não mudou.
     
     Returns:
-        Inquilino atualizado.
+        Inquilino atualizado (com o novo ETag no header).
     
     Raises:
-        HTTPException: Se o ID for inválido ou inquilino não encontrado.
+        HTTPException: Se o ID for inválido, inquilino não encontrado, CPF duplicado
+            ou If-Match não conferir.
     """
     if not PydanticObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="ID inválido")
     
-    inquilino = await Inquilino.get(id)
-    if not inquilino:
-        raise HTTPException(status_code=404, detail="Inquilino não encontrado")
-    
-    await inquilino.set(dados.model_dump(exclude_unset=True))
+    try:
+        anterior, inquilino = await atualizar_documento(
+            Inquilino, PydanticObjectId(id), dados.model_dump(exclude_unset=True),
+            if_match, response, "Inquilino não encontrado",
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Já existe um inquilino com este CPF")
+    if resumos.mudou(resumos.CAMPOS_INQUILINO, anterior, inquilino):
+        tarefas.add_task(resumos.propagar_inquilino, inquilino.id)
+    await cache_entidades.invalidar(Inquilino, inquilino.id)
+    await invalidar("inquilinos")
     return inquilino
 
 
@@ -133,4 +255,6 @@ async def deletar_inquilino(id: str):
         raise HTTPException(status_code=404, detail="Inquilino não encontrado")
     
     await inquilino.delete()
+    await cache_entidades.invalidar(Inquilino, inquilino.id)
+    await invalidar("inquilinos")
     return {"message": "Inquilino deletado com sucesso"}
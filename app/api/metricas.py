@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.cache_entidades import cache_entidades
+from app.core.metricas import registro
+
+router = APIRouter(tags=["Métricas"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metricas():
+    """
+    Métricas no formato de texto do Prometheus: latência por rota e status,
+    comandos MongoDB por requisição, tempo gasto no banco e uso do cache de entidades.
+    """
+    texto = registro.renderizar() + await cache_entidades.renderizar()
+    return PlainTextResponse(texto, media_type="text/plain; version=0.0.4; charset=utf-8")
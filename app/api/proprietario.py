@@ -1,5 +1,15 @@
 from beanie import PydanticObjectId
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Body, Header, HTTPException, Query, Response
+from app.core.cache import invalidar
+from app.core.cache_entidades import cache_entidades
+from app.core.contagem import DESCRICAO_COM_TOTAL, pagina_e_total, resposta_com_total
+from app.core.config import settings
+from app.core.etag import atualizar_documento, ler_cru, responder_nao_modificado
+from app.core.lote import buscar_em_lote, inserir_em_lote, ordenar_resultados
+from app.models.lote import ResultadoBuscaLote, ResultadoItemLote
+from app.core.paginacao import definir_proximo_cursor, filtro_cursor, ordenacao
+from app.core.projecao import DESCRICAO_FIELDS, modelo_projecao, resposta_projetada
+from app.core.serializacao import listar_crus, resposta_rapida
 from app.models.proprietario import Proprietario, ProprietarioCreate, ProprietarioUpdate
 
 router = APIRouter(prefix="/proprietarios", tags=["Proprietários"])
@@ -9,34 +19,102 @@ router = APIRouter(prefix="/proprietarios", tags=["Proprietários"])
 async def criar_proprietario(dados: ProprietarioCreate):
     # Como o Create e o Document tem os mesmos campos, podemos converter direto
     novo_prop = Proprietario(**dados.model_dump())
-    return await novo_prop.insert()
+    await novo_prop.insert()
+    await invalidar("proprietarios")
+    return novo_prop
+
+
+@router.post("/bulk", response_model=list[ResultadoItemLote])
+async def criar_proprietarios_em_lote(
+    dados: list[ProprietarioCreate] = Body(max_length=settings.BULK_MAX_ITENS)
+):
+    # Um único insert_many não ordenado; o resultado vem item a item, na ordem enviada
+    novos = {indice: Proprietario(**item.model_dump()) for indice, item in enumerate(dados)}
+    resultados = await inserir_em_lote(Proprietario, novos)
+    if any(r.status == "criado" for r in resultados.values()):
+        await invalidar("proprietarios")
+    return ordenar_resultados(resultados)
+
+
+@router.post("/batch-get", response_model=list[ResultadoBuscaLote[Proprietario]])
+async def buscar_proprietarios_em_lote(
+    ids: list[str] = Body(max_length=settings.BATCH_GET_MAX_IDS)
+):
+    # Uma única consulta $in; cada id volta na ordem enviada, com 400/404 nos inválidos/inexistentes
+    return await buscar_em_lote(Proprietario, ids, "Proprietário não encontrado")
 
 
 @router.get("/", response_model=list[Proprietario])
-async def listar_proprietarios(skip: int = Query(0), limit: int = Query(10)):
-    return await Proprietario.find_all().skip(skip).limit(limit).to_list()
+async def listar_proprietarios(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: str | None = Query(None, description="Cursor da próxima página (header X-Next-Cursor)"),
+    fields: str | None = Query(None, description=DESCRICAO_FIELDS),
+    com_total: bool = Query(False, description=DESCRICAO_COM_TOTAL)
+):
+    # Com cursor a paginação é por keyset (_id) e o skip é ignorado
+    parcial = modelo_projecao(Proprietario, fields)
+    filtros = {}
+    if cursor:
+        filtros = filtro_cursor(cursor)
+        skip = 0
+    if com_total:
+        documentos, total = await pagina_e_total(
+            Proprietario, {}, ordenacao(), skip, limit, filtro_pagina=filtros, parcial=parcial
+        )
+        definir_proximo_cursor(response, documentos, limit)
+        return resposta_com_total(Proprietario, documentos, total, response, parcial)
+    if settings.SERIALIZACAO_RAPIDA and not parcial:
+        documentos = await listar_crus(Proprietario, filtros, ordenacao(), skip, limit)
+        definir_proximo_cursor(response, documentos, limit)
+        return resposta_rapida(Proprietario, documentos, response)
+    query = Proprietario.find(filtros).skip(skip)
+    if parcial:
+        query = query.project(parcial)
+    proprietarios = await query.sort(ordenacao()).limit(limit).to_list()
+    definir_proximo_cursor(response, proprietarios, limit)
+    return resposta_projetada(proprietarios, response) if parcial else proprietarios
 
 
 @router.get("/{id}", response_model=Proprietario)
-async def obter_proprietario(id: str):
+async def obter_proprietario(
+    id: str,
+    response: Response,
+    fields: str | None = Query(None, description=DESCRICAO_FIELDS),
+    if_none_match: str | None = Header(None)
+):
     if not PydanticObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="ID inválido")
-    prop = await Proprietario.get(id)
-    if not prop:
+    parcial = modelo_projecao(Proprietario, fields)
+    documento = await ler_cru(Proprietario, PydanticObjectId(id), parcial)
+    if not documento:
         raise HTTPException(status_code=404, detail="Proprietário não encontrado")
-    return prop
+    # ETag no header; If-None-Match com a mesma versão recebe 304 sem corpo
+    if nao_modificado := responder_nao_modificado(documento, if_none_match, response):
+        return nao_modificado
+    if parcial:
+        return resposta_projetada(parcial.model_validate(documento), response)
+    return Proprietario.model_validate(documento)
 
 
 @router.put("/{id}", response_model=Proprietario)
-async def atualizar_proprietario(id: str, dados: ProprietarioUpdate):
+async def atualizar_proprietario(
+    id: str,
+    dados: ProprietarioUpdate,
+    response: Response,
+    if_match: str | None = Header(None)
+):
     if not PydanticObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="ID inválido")
 
-    prop = await Proprietario.get(id)
-    if not prop:
-        raise HTTPException(status_code=404, detail="Proprietário não encontrado")
-
-    await prop.set(dados.model_dump(exclude_unset=True))
+    # Com If-Match o update só é aplicado se o proprietário não mudou (senão 412)
+    _, prop = await atualizar_documento(
+        Proprietario, PydanticObjectId(id), dados.model_dump(exclude_unset=True),
+        if_match, response, "Proprietário não encontrado",
+    )
+    await cache_entidades.invalidar(Proprietario, prop.id)
+    await invalidar("proprietarios")
     return prop
 
 
@@ -50,4 +128,6 @@ async def deletar_proprietario(id: str):
         raise HTTPException(status_code=404, detail="Proprietário não encontrado")
 
     await prop.delete()
+    await cache_entidades.invalidar(Proprietario, prop.id)
+    await invalidar("proprietarios")
     return {"message": "Proprietário deletado com sucesso"}
\ No newline at end of file
@@ -0,0 +1,250 @@
+"""
+Cache de respostas para as rotas de leitura do dashboard e das consultas.
+
+Cada resposta é guardada pela rota e pelos parâmetros recebidos, junto com as
+"tags" das coleções de que depende. As rotas de escrita chamam invalidar()
+com as coleções que alteraram, removendo apenas as respostas afetadas.
+
+Cada tag tem uma geração, incrementada a cada invalidação. Uma resposta só é
+guardada se as gerações das suas tags não mudaram enquanto ela era calculada;
+caso contrário ela pode ter sido lida antes da escrita e ficaria no cache até
+vencer. Respostas maiores que Settings.CACHE_MAX_BYTES_RESPOSTA não são guardadas.
+
+Backends disponíveis (Settings.CACHE_BACKEND):
+- "memoria": LRU com TTL dentro do processo (padrão).
+- "mongo": coleção compartilhada com índice TTL, para vários workers.
+- "desligado": não guarda nada.
+"""
+import functools
+import json
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic_core import to_json
+from pymongo import UpdateOne
+
+from app.core.config import settings
+
+
+class CacheMemoria:
+    """LRU em memória com expiração por TTL e índice de chaves por tag."""
+
+    def __init__(self, max_itens: int):
+        self.max_itens = max_itens
+        self._itens: OrderedDict[str, tuple[float, set[str], Any]] = OrderedDict()
+        self._por_tag: dict[str, set[str]] = {}
+        self._geracoes: Counter[str] = Counter()
+
+    async def obter(self, chave: str) -> Any | None:
+        item = self._itens.get(chave)
+        if item is None:
+            return None
+        expira_em, _, valor = item
+        if expira_em < time.monotonic():
+            self._remover(chave)
+            return None
+        self._itens.move_to_end(chave)
+        return valor
+
+    async def guardar(self, chave: str, valor: Any, tags: set[str], ttl: int) -> None:
+        self._remover(chave)
+        self._itens[chave] = (time.monotonic() + ttl, tags, valor)
+        for tag in tags:
+            self._por_tag.setdefault(tag, set()).add(chave)
+        while len(self._itens) > self.max_itens:
+            self._remover(next(iter(self._itens)))
+
+    async def invalidar(self, tags: set[str]) -> None:
+        for tag in tags:
+            self._geracoes[tag] += 1
+            for chave in list(self._por_tag.get(tag, ())):
+                self._remover(chave)
+
+    async def geracao(self, tags: set[str]) -> tuple:
+        return tuple(self._geracoes[tag] for tag in sorted(tags))
+
+    async def remover(self, chave: str) -> None:
+        self._remover(chave)
+
+    async def tamanho(self) -> int:
+        return len(self._itens)
+
+    def _remover(self, chave: str) -> None:
+        item = self._itens.pop(chave, None)
+        if item is None:
+            return
+        for tag in item[1]:
+            chaves = self._por_tag.get(tag)
+            if chaves is not None:
+                chaves.discard(chave)
+                if not chaves:
+                    del self._por_tag[tag]
+
+
+class CacheMongo:
+    """
+    Cache compartilhado entre workers em uma coleção do próprio MongoDB.
+    As gerações das tags ficam em uma segunda coleção, para valerem entre os workers.
+    """
+
+    def __init__(self, database: AsyncIOMotorDatabase, colecao: str = "cache_respostas"):
+        self._colecao = database[colecao]
+        self._geracoes = database[f"{colecao}_geracoes"]
+
+    async def preparar(self) -> None:
+        # O MongoDB remove sozinho os documentos vencidos
+        await self._colecao.create_index("expira_em", expireAfterSeconds=0)
+        await self._colecao.create_index("tags")
+
+    async def obter(self, chave: str) -> Any | None:
+        doc = await self._colecao.find_one(
+            {"_id": chave, "expira_em": {"$gt": datetime.now(timezone.utc)}}
+        )
+        return doc["valor"] if doc else None
+
+    async def guardar(self, chave: str, valor: Any, tags: set[str], ttl: int) -> None:
+        await self._colecao.replace_one(
+            {"_id": chave},
+            {
+                "valor": valor,
+                "tags": sorted(tags),
+                "expira_em": datetime.now(timezone.utc) + timedelta(seconds=ttl),
+            },
+            upsert=True,
+        )
+
+    async def invalidar(self, tags: set[str]) -> None:
+        # A geração muda antes da remoção: quem guardar depois dela descarta o que guardou
+        await self._geracoes.bulk_write(
+            [UpdateOne({"_id": tag}, {"$inc": {"n": 1}}, upsert=True) for tag in sorted(tags)],
+            ordered=False,
+        )
+        await self._colecao.delete_many({"tags": {"$in": sorted(tags)}})
+
+    async def geracao(self, tags: set[str]) -> tuple:
+        docs = await self._geracoes.find({"_id": {"$in": sorted(tags)}}).to_list(None)
+        return tuple(sorted((doc["_id"], doc["n"]) for doc in docs))
+
+    async def remover(self, chave: str) -> None:
+        await self._colecao.delete_one({"_id": chave})
+
+    async def tamanho(self) -> int:
+        return await self._colecao.estimated_document_count()
+
+
+class CacheRespostas:
+    """Fachada usada pelas rotas: escolhe o backend e conta acertos e falhas."""
+
+    def __init__(self):
+        self.backend: CacheMemoria | CacheMongo | None = CacheMemoria(settings.CACHE_MAX_ITENS)
+        self.hits = 0
+        self.misses = 0
+
+    async def configurar(self, database: AsyncIOMotorDatabase) -> None:
+        """Define o backend conforme Settings.CACHE_BACKEND (chamado pelo init_db)."""
+        if settings.CACHE_BACKEND == "mongo":
+            backend = CacheMongo(database)
+            await backend.preparar()
+            self.backend = backend
+        elif settings.CACHE_BACKEND == "desligado":
+            self.backend = None
+        else:
+            self.backend = CacheMemoria(settings.CACHE_MAX_ITENS)
+
+    async def obter(self, chave: str) -> Any | None:
+        if self.backend is None:
+            return None
+        valor = await self.backend.obter(chave)
+        if valor is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return valor
+
+    async def geracao(self, tags: set[str]) -> tuple | None:
+        """Gerações atuais das tags, lidas antes de calcular a resposta a guardar."""
+        if self.backend is None:
+            return None
+        return await self.backend.geracao(tags)
+
+    async def guardar(self, chave: str, valor: Any, tags: set[str], geracao: tuple | None) -> None:
+        """
+        Guarda a resposta se nenhuma das tags foi invalidada desde geracao().
+        A geração é conferida de novo depois da escrita, porque uma invalidação
+        entre a conferência e a escrita não removeria o item recém-guardado.
+        """
+        if self.backend is None or len(to_json(valor)) > settings.CACHE_MAX_BYTES_RESPOSTA:
+            return
+        if await self.backend.geracao(tags) != geracao:
+            return
+        await self.backend.guardar(chave, valor, tags, settings.CACHE_TTL_SEGUNDOS)
+        if await self.backend.geracao(tags) != geracao:
+            await self.backend.remover(chave)
+
+    async def invalidar(self, *tags: str) -> None:
+        if self.backend is not None:
+            await self.backend.invalidar(set(tags))
+
+    async def estatisticas(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": settings.CACHE_BACKEND if self.backend is not None else "desligado",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "itens": await self.backend.tamanho() if self.backend is not None else 0,
+        }
+
+
+cache = CacheRespostas()
+
+
+async def invalidar(*tags: str) -> None:
+    """Remove as respostas em cache que dependem das coleções informadas."""
+    await cache.invalidar(*tags)
+
+
+def cache_resposta(*tags: str):
+    """
+    Decorator para rotas GET: guarda a resposta pela rota e parâmetros recebidos.
+
+    Headers definidos no Response injetado (como o X-Next-Cursor) são guardados
+    junto e reaplicados nos acertos. Rotas que devolvem um Response próprio
+    (por exemplo StreamingResponse) não são guardadas, nem respostas calculadas
+    enquanto alguma das tags era invalidada.
+
+    Args:
+        tags: Coleções de que a resposta depende.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            response = next((v for v in kwargs.values() if isinstance(v, Response)), None)
+            parametros = {k: v for k, v in kwargs.items() if not isinstance(v, Response)}
+            chave = f"{func.__module__}.{func.__name__}:" + json.dumps(
+                parametros, sort_keys=True, default=str
+            )
+
+            guardado = await cache.obter(chave)
+            if guardado is not None:
+                if response is not None:
+                    response.headers.update(guardado["headers"])
+                return guardado["corpo"]
+
+            geracao = await cache.geracao(set(tags))
+            resultado = await func(**kwargs)
+            if isinstance(resultado, Response):
+                return resultado
+
+            corpo = jsonable_encoder(resultado)
+            headers = dict(response.headers) if response is not None else {}
+            await cache.guardar(chave, {"corpo": corpo, "headers": headers}, set(tags), geracao)
+            return corpo
+
+        return wrapper
+    return decorator
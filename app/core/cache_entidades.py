@@ -0,0 +1,131 @@
+"""
+Cache de leitura por id de proprietários, imóveis e inquilinos.
+
+As mesmas poucas milhares de entidades são lidas em toda criação de contrato e
+de imóvel (validação das referências) e em todo GET por id. O cache guarda o
+documento cru, como veio do MongoDB, em um LRU com TTL dentro do processo,
+com a chave "<coleção>:<id>".
+
+As rotas que alteram ou removem uma dessas entidades (inclusive o status do
+imóvel nas rotas de contrato) chamam invalidar() com os ids afetados, depois
+de a escrita ter sido confirmada. Escritas feitas por outros workers só são
+vistas quando o item vence, então o TTL é o atraso máximo entre processos.
+
+Os documentos devolvidos são compartilhados entre as requisições e não devem
+ser alterados por quem os recebe.
+"""
+from collections import Counter
+from typing import Any
+
+from beanie import Document
+
+from app.core.cache import CacheMemoria
+from app.core.config import settings
+
+# Coleções com cache por id (os contratos mudam por update_many e ficam de fora)
+COLECOES = {"proprietarios", "imoveis", "inquilinos"}
+
+
+class CacheEntidades:
+    """Read-through por id sobre um CacheMemoria, com acertos e falhas por coleção."""
+
+    def __init__(self):
+        self._itens = CacheMemoria(settings.CACHE_ENTIDADES_MAX_ITENS)
+        # Incrementado a cada invalidação: uma leitura que cruzou com uma escrita
+        # não guarda o que leu, que pode ser a versão anterior
+        self._invalidacoes = 0
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+
+    def configurar(self) -> None:
+        """Esvazia o cache e aplica os limites atuais de Settings (chamado pelo init_db)."""
+        self._itens = CacheMemoria(settings.CACHE_ENTIDADES_MAX_ITENS)
+        self._invalidacoes += 1
+        self.hits.clear()
+        self.misses.clear()
+
+    def usa_cache(self, model: type[Document]) -> bool:
+        return settings.CACHE_ENTIDADES_MAX_ITENS > 0 and model.get_collection_name() in COLECOES
+
+    async def obter(self, model: type[Document], id: Any) -> dict | None:
+        """
+        Documento cru pelo id, do cache ou do MongoDB.
+
+        Returns:
+            O documento, ou None se não existir (ausências não são guardadas).
+        """
+        if not self.usa_cache(model):
+            return await model.get_motor_collection().find_one({"_id": id})
+
+        colecao = model.get_collection_name()
+        chave = f"{colecao}:{id}"
+        documento = await self._itens.obter(chave)
+        if documento is not None:
+            self.hits[colecao] += 1
+            return documento
+
+        self.misses[colecao] += 1
+        invalidacoes = self._invalidacoes
+        documento = await model.get_motor_collection().find_one({"_id": id})
+        if documento is not None and invalidacoes == self._invalidacoes:
+            await self._itens.guardar(
+                chave, documento, {colecao}, settings.CACHE_ENTIDADES_TTL_SEGUNDOS
+            )
+        return documento
+
+    async def invalidar(self, model: type[Document], *ids: Any) -> None:
+        """Remove do cache as entidades alteradas ou removidas."""
+        self._invalidacoes += 1
+        colecao = model.get_collection_name()
+        for id in ids:
+            await self._itens.remover(f"{colecao}:{id}")
+
+    async def invalidar_colecao(self, model: type[Document]) -> None:
+        """Remove todas as entidades da coleção (escritas em massa)."""
+        self._invalidacoes += 1
+        await self._itens.invalidar({model.get_collection_name()})
+
+    async def estatisticas(self) -> dict:
+        hits, misses = sum(self.hits.values()), sum(self.misses.values())
+        return {
+            "ligado": settings.CACHE_ENTIDADES_MAX_ITENS > 0,
+            "max_itens": settings.CACHE_ENTIDADES_MAX_ITENS,
+            "ttl_segundos": settings.CACHE_ENTIDADES_TTL_SEGUNDOS,
+            "itens": await self._itens.tamanho(),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": _razao(hits, misses),
+            "colecoes": {
+                colecao: {
+                    "hits": self.hits[colecao],
+                    "misses": self.misses[colecao],
+                    "hit_ratio": _razao(self.hits[colecao], self.misses[colecao]),
+                }
+                for colecao in sorted(COLECOES)
+            },
+        }
+
+    async def renderizar(self) -> str:
+        """Tamanho e acertos/falhas por coleção no formato de texto do Prometheus."""
+        linhas = [
+            "# HELP entity_cache_items Entidades guardadas no cache de leitura por id.",
+            "# TYPE entity_cache_items gauge",
+            f"entity_cache_items {await self._itens.tamanho()}",
+            "# HELP entity_cache_requests_total Leituras por id atendidas pelo cache (hit) ou pelo MongoDB (miss).",
+            "# TYPE entity_cache_requests_total counter",
+        ]
+        for colecao in sorted(COLECOES):
+            for resultado, contador in (("hit", self.hits), ("miss", self.misses)):
+                linhas.append(
+                    f'entity_cache_requests_total{{collection="{colecao}",result="{resultado}"}} '
+                    f"{contador[colecao]}"
+                )
+        return "\n".join(linhas) + "\n"
+
+
+def _razao(hits: int, misses: int) -> float:
+    total = hits + misses
+    return round(hits / total, 4) if total else 0.0
+
+
+cache_entidades = CacheEntidades()
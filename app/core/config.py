@@ -6,6 +6,56 @@ class Settings(BaseSettings):
     MONGODB_URL: str
     DATABASE_NAME: str
 
+    # Remove no startup índices que existem no banco mas não estão declarados nos models
+    MONGODB_DROP_INDICES: bool = False
+
+    # Pool de conexões do Motor; o mínimo é aberto já no startup (aquecimento)
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 10
+    # Compressão do protocolo, em ordem de preferência; só os instalados são usados
+    MONGODB_COMPRESSORS: str = "zstd,snappy,zlib"
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGODB_CONNECT_TIMEOUT_MS: int = 5000
+    MONGODB_SOCKET_TIMEOUT_MS: int = 30000
+
+    # Usa transações multi-documento nas escritas de contrato (exige replica set,
+    # como no Atlas; o MongoDB standalone do docker-compose não suporta)
+    MONGODB_TRANSACOES: bool = False
+
+    # Cache de respostas do dashboard e das consultas: "memoria", "mongo" ou "desligado"
+    CACHE_BACKEND: str = "memoria"
+    CACHE_TTL_SEGUNDOS: int = 30
+    CACHE_MAX_ITENS: int = 1024
+    # Respostas maiores não são guardadas (no backend "mongo" cada uma vira um
+    # documento, limitado a 16MB pelo MongoDB)
+    CACHE_MAX_BYTES_RESPOSTA: int = 1_048_576
+
+    # Cache de leitura por id de proprietários, imóveis e inquilinos (0 desliga).
+    # Com vários workers, o TTL é o atraso máximo para ver escritas de outro processo
+    CACHE_ENTIDADES_MAX_ITENS: int = 10000
+    CACHE_ENTIDADES_TTL_SEGUNDOS: int = 60
+
+    # Quantidade máxima de itens aceitos pelas rotas POST /<entidade>/bulk
+    BULK_MAX_ITENS: int = 5000
+    # Quantidade máxima de ids aceitos pelas rotas POST /<entidade>/batch-get
+    BATCH_GET_MAX_IDS: int = 5000
+
+    # Encerramento automático de contratos vencidos (app/services/vencimentos.py):
+    # intervalo entre execuções no processo (0, o padrão, desliga o agendamento; a
+    # rota manual continua disponível), contratos por lote e pausa entre lotes.
+    # Cada processo que o ligar executa o job, então com vários workers ligue em um só
+    VENCIMENTO_INTERVALO_MINUTOS: int = 0
+    VENCIMENTO_LOTE: int = 1000
+    VENCIMENTO_PAUSA_MS: int = 100
+
+    # Listagens geram o JSON direto dos documentos crus, sem instanciar os models
+    SERIALIZACAO_RAPIDA: bool = False
+
+    # Detector de N+1: "desligado", "aviso" (loga) ou "erro" (levanta exceção, para CI)
+    N1_MODO: str = "desligado"
+    # Máximo de comandos MongoDB por requisição antes de acusar N+1
+    N1_ORCAMENTO_COMANDOS: int = 20
+
     # Isso garante que ele procure o .env na raiz do projeto
     model_config = ConfigDict(
         env_file=".env",
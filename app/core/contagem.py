@@ -0,0 +1,102 @@
+"""
+Total de documentos junto com a página (parâmetro com_total=) nas listagens e buscas.
+
+Com filtros, a página e o total saem de um único aggregate com $facet: os
+documentos filtrados são lidos uma vez e divididos entre a página ($sort com
+$skip/$limit, limitado em memória aos itens até o fim da página) e o $count.
+Sem filtros, o total vem do estimated_document_count (metadados da coleção),
+em paralelo com a busca da página.
+
+O total considera só os filtros da consulta: o filtro do cursor muda a página,
+não o total.
+"""
+import asyncio
+from typing import Iterable
+
+from beanie import Document
+from beanie.odm.utils.projection import get_projection
+from fastapi import Response
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.projecao import resposta_projetada
+from app.core.serializacao import resposta_rapida
+
+DESCRICAO_COM_TOTAL = (
+    "Com true, responde {items, total}: a página e o total de documentos que atendem aos filtros"
+)
+
+
+async def pagina_e_total(
+    model: type[Document],
+    filtros: dict,
+    sort: list[tuple[str, int]],
+    skip: int = 0,
+    limit: int | None = None,
+    filtro_pagina: dict | None = None,
+    parcial: type[BaseModel] | None = None,
+    preparo: Iterable[dict] = (),
+    complemento: Iterable[dict] = (),
+) -> tuple[list[dict], int]:
+    """
+    Busca uma página de documentos crus e o total em uma ida ao banco.
+
+    Args:
+        model: Document consultado.
+        filtros: Filtros da consulta (os que definem o total).
+        sort: Ordenação da página.
+        skip: Documentos a pular.
+        limit: Tamanho da página (None para todos).
+        filtro_pagina: Filtro do cursor, aplicado só à página.
+        parcial: Model enxuto de fields= (projeção dos documentos da página).
+        preparo: Estágios aplicados aos documentos filtrados antes da ordenação
+            (ex.: o $addFields da relevância da busca textual).
+        complemento: Estágios aplicados só aos documentos da página (ex.: $lookup).
+
+    Returns:
+        (documentos da página, total de documentos que atendem aos filtros).
+    """
+    pagina = [{"$match": filtro_pagina}] if filtro_pagina else []
+    pagina.append({"$sort": dict(sort)})
+    if skip:
+        pagina.append({"$skip": skip})
+    if limit:
+        pagina.append({"$limit": limit})
+    if parcial:
+        pagina.append({"$project": get_projection(parcial)})
+    pagina += complemento
+
+    colecao = model.get_motor_collection()
+    if not filtros and not preparo:
+        documentos, total = await asyncio.gather(
+            colecao.aggregate(pagina).to_list(None),
+            colecao.estimated_document_count(),
+        )
+        return documentos, total
+
+    estagios = [{"$match": filtros}] if filtros else []
+    estagios += [
+        *preparo,
+        {"$facet": {"items": pagina, "total": [{"$count": "total"}]}},
+    ]
+    faceta = (await colecao.aggregate(estagios).to_list(1))[0]
+    return faceta["items"], faceta["total"][0]["total"] if faceta["total"] else 0
+
+
+def resposta_com_total(
+    model: type[Document],
+    documentos: list,
+    total: int,
+    response: Response | None = None,
+    parcial: type[BaseModel] | None = None,
+) -> Response:
+    """
+    Monta a resposta {items, total} das rotas com response_model de lista.
+    Aceita documentos crus ou já instanciados (ex.: depois do expand).
+    """
+    crus = all(isinstance(documento, dict) for documento in documentos)
+    if settings.SERIALIZACAO_RAPIDA and not parcial and crus:
+        return resposta_rapida(model, documentos, response, total)
+    tipo = parcial or model
+    itens = [tipo.model_validate(d) if isinstance(d, dict) else d for d in documentos]
+    return resposta_projetada({"items": itens, "total": total}, response)
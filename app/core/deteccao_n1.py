@@ -0,0 +1,98 @@
+"""
+Detector de consultas N+1 para desenvolvimento e CI.
+
+Usa o mesmo CommandListener das métricas (app/core/metricas.py) para anotar o
+"formato" de cada comando emitido na requisição: nome do comando, coleção e
+chaves do filtro, sem os valores. Um laço que busca documento por documento
+aparece como o mesmo formato repetido muitas vezes.
+
+Modos (Settings.N1_MODO):
+- "desligado": nada é anotado (padrão).
+- "aviso": loga um warning com a rota e o formato mais repetido.
+- "erro": levanta ConsultasExcessivasError, para que os testes falhem.
+
+getMore e killCursors não entram na conta: são a continuação de um cursor já
+aberto (como no streaming NDJSON), não novas consultas.
+"""
+import logging
+from collections import Counter
+from typing import Any
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Comandos que apenas continuam ou encerram um cursor
+COMANDOS_IGNORADOS = {"getMore", "killCursors"}
+
+
+class ConsultasExcessivasError(RuntimeError):
+    """Requisição emitiu mais comandos MongoDB que o orçamento configurado."""
+
+
+def ativo() -> bool:
+    return settings.N1_MODO in ("aviso", "erro")
+
+
+def _chaves(filtro: Any) -> str:
+    """Resume um filtro às suas chaves (e operadores), descartando os valores."""
+    if not isinstance(filtro, dict):
+        return "{}"
+    partes = []
+    for chave, valor in sorted(filtro.items()):
+        if isinstance(valor, dict) and valor and all(str(k).startswith("$") for k in valor):
+            partes.append(f"{chave}:{','.join(sorted(valor))}")
+        else:
+            partes.append(chave)
+    return "{" + ", ".join(partes) + "}"
+
+
+def formato_comando(nome: str, comando: dict) -> str | None:
+    """
+    Descreve o comando sem os valores, para agrupar repetições.
+
+    Returns:
+        Texto como "find imoveis {proprietario.$id}", ou None para comandos ignorados.
+    """
+    if nome in COMANDOS_IGNORADOS:
+        return None
+    colecao = comando.get(nome)
+    alvo = f"{nome} {colecao}" if isinstance(colecao, str) else nome
+
+    if nome in ("find", "count", "distinct"):
+        return f"{alvo} {_chaves(comando.get('filter', comando.get('query')))}"
+    if nome == "aggregate":
+        estagios = [next(iter(estagio), "?") for estagio in comando.get("pipeline", [])]
+        match = next(
+            (estagio["$match"] for estagio in comando.get("pipeline", []) if "$match" in estagio),
+            None,
+        )
+        return f"{alvo} [{', '.join(estagios)}] {_chaves(match)}"
+    if nome in ("update", "delete"):
+        operacoes = comando.get("updates") or comando.get("deletes") or [{}]
+        return f"{alvo} {_chaves(operacoes[0].get('q'))}"
+    if nome == "findAndModify":
+        return f"{alvo} {_chaves(comando.get('query'))}"
+    return alvo
+
+
+def verificar(metodo: str, rota: str, formatos: Counter) -> None:
+    """
+    Compara o total de comandos da requisição com o orçamento.
+
+    Raises:
+        ConsultasExcessivasError: No modo "erro", se o orçamento foi excedido.
+    """
+    total = sum(formatos.values())
+    if total <= settings.N1_ORCAMENTO_COMANDOS:
+        return
+
+    formato, repeticoes = formatos.most_common(1)[0]
+    mensagem = (
+        f"[N+1] {metodo} {rota}: {total} comandos MongoDB "
+        f"(orçamento {settings.N1_ORCAMENTO_COMANDOS}); "
+        f"mais repetido {repeticoes}x: {formato}"
+    )
+    if settings.N1_MODO == "erro":
+        raise ConsultasExcessivasError(mensagem)
+    logger.warning(mensagem)
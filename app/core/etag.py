@@ -0,0 +1,165 @@
+"""
+ETags e requisições condicionais nas rotas de entidade.
+
+A revisão de cada documento é o hash do BSON armazenado: qualquer escrita
+(incluindo os $set, update_many e find_one_and_update espalhados pelas rotas e
+jobs) muda o ETag sem que cada caminho precise incrementar um contador. Com
+fields= o hash é do documento projetado, então cada representação tem o seu.
+
+- GET com If-None-Match igual ao ETag atual: 304 sem corpo, sem montar o model.
+- PUT com If-Match: o update só é aplicado se o documento ainda for exatamente
+  o que o cliente leu; caso contrário, 412.
+"""
+import hashlib
+
+import bson
+from beanie import Document, PydanticObjectId
+from beanie.odm.utils.encoder import Encoder
+from beanie.odm.utils.projection import get_projection
+from fastapi import HTTPException, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+from pymongo import ReturnDocument
+
+from app.core.cache_entidades import cache_entidades
+
+MENSAGEM_PRECONDICAO = "O documento foi alterado desde a última leitura (If-Match não confere)"
+
+
+def etag(documento: dict) -> str:
+    """ETag forte do documento cru (como está no MongoDB)."""
+    return '"' + hashlib.blake2b(bson.encode(documento), digest_size=16).hexdigest() + '"'
+
+
+def _valores(cabecalho: str) -> list[str]:
+    return [valor.strip() for valor in cabecalho.split(",") if valor.strip()]
+
+
+def nao_modificado(if_none_match: str | None, atual: str) -> bool:
+    """Comparação fraca do If-None-Match (RFC 9110): ignora o prefixo W/."""
+    if not if_none_match:
+        return False
+    valores = _valores(if_none_match)
+    return "*" in valores or atual in (v.removeprefix("W/") for v in valores)
+
+
+def confere(if_match: str, atual: str) -> bool:
+    """Comparação forte do If-Match: ETags fracos nunca conferem."""
+    valores = _valores(if_match)
+    return "*" in valores or atual in valores
+
+
+def filtro_inalterado(documento: dict) -> dict:
+    """Filtro que só casa se o documento armazenado for idêntico ao informado."""
+    return {"$expr": {"$eq": ["$$ROOT", {"$literal": documento}]}}
+
+
+async def ler_cru(
+    model: type[Document], id: PydanticObjectId, parcial: type[BaseModel] | None = None
+) -> dict | None:
+    """
+    Lê o documento sem instanciar o model (com projeção, se houver).
+    Entidades com cache por id são lidas dele e projetadas aqui, na mesma ordem
+    de campos que o MongoDB devolveria (o ETag é o mesmo).
+    """
+    projecao = get_projection(parcial) if parcial else None
+    if not cache_entidades.usa_cache(model):
+        return await model.get_motor_collection().find_one({"_id": id}, projecao)
+    documento = await cache_entidades.obter(model, id)
+    if documento is None or projecao is None:
+        return documento
+    return {campo: valor for campo, valor in documento.items() if campo == "_id" or campo in projecao}
+
+
+def responder_nao_modificado(
+    documento: dict, if_none_match: str | None, response: Response
+) -> Response | None:
+    """
+    Define o header ETag e, se o cliente já tiver essa versão, devolve o 304.
+
+    Returns:
+        A resposta 304 a ser retornada pela rota, ou None para seguir normalmente.
+    """
+    atual = etag(documento)
+    if nao_modificado(if_none_match, atual):
+        return Response(status_code=304, headers={"ETag": atual})
+    response.headers["ETag"] = atual
+    return None
+
+
+def verificar_if_match(documento: dict, if_match: str | None) -> dict:
+    """
+    Confere o If-Match contra o documento lido.
+
+    Returns:
+        Filtro a ser somado ao do update para que ele só seja aplicado se o
+        documento não mudar até a escrita ({} sem If-Match).
+
+    Raises:
+        HTTPException: 412 se o ETag não conferir.
+    """
+    if if_match is None:
+        return {}
+    if not confere(if_match, etag(documento)):
+        raise HTTPException(status_code=412, detail=MENSAGEM_PRECONDICAO)
+    return filtro_inalterado(documento)
+
+
+def aplicar_set(documento: dict, alteracoes: dict) -> dict:
+    """
+    Estado do documento depois de um $set nos campos existentes, sem relê-lo.
+    Campos existentes mantêm a posição, como no MongoDB.
+    """
+    return {**documento, **Encoder().encode(alteracoes)}
+
+
+async def atualizar_documento(
+    model: type[Document],
+    id: PydanticObjectId,
+    alteracoes: dict,
+    if_match: str | None,
+    response: Response,
+    nao_encontrado: str,
+) -> tuple[Document, Document]:
+    """
+    $set condicional usado pelos PUT: lê o documento, confere o If-Match e grava
+    com find_one_and_update, devolvendo o ETag da nova versão no header.
+
+    O documento resultante é validado pelo model antes da escrita, para que uma
+    alteração inválida nunca chegue ao banco.
+
+    Returns:
+        (documento antes, documento depois) já como instâncias do model.
+
+    Raises:
+        HTTPException: 404 se não existir; 412 se o If-Match não conferir ou se o
+            documento mudar entre a leitura e a escrita.
+        RequestValidationError: Se o documento alterado não for válido (422).
+    """
+    colecao = model.get_motor_collection()
+    antes = await colecao.find_one({"_id": id})
+    if antes is None:
+        raise HTTPException(status_code=404, detail=nao_encontrado)
+    try:
+        model.model_validate(aplicar_set(antes, alteracoes))
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**erro, "loc": ("body", *erro["loc"])} for erro in e.errors(include_url=False)]
+        )
+
+    filtro = {"_id": id, **verificar_if_match(antes, if_match)}
+    depois = antes
+    if alteracoes:
+        depois = await colecao.find_one_and_update(
+            filtro,
+            {"$set": Encoder().encode(alteracoes)},
+            return_document=ReturnDocument.AFTER,
+        )
+        if depois is None:
+            # Sem If-Match, só deixa de casar se o documento foi removido nesse meio tempo
+            if if_match is None:
+                raise HTTPException(status_code=404, detail=nao_encontrado)
+            raise HTTPException(status_code=412, detail=MENSAGEM_PRECONDICAO)
+
+    response.headers["ETag"] = etag(depois)
+    return model.model_validate(antes), model.model_validate(depois)
@@ -0,0 +1,99 @@
+"""
+Expansão em lote dos links (parâmetro expand=) nas listagens.
+
+Sem expansão, os links de um documento saem como {"id", "collection"} e o
+cliente precisa de um GET por link. Com fetch_links=True o Beanie resolve os
+links documento a documento. O CarregadorLinks junta os ids referenciados por
+uma página inteira e busca cada coleção com um único $in, guardando os
+documentos já carregados durante a requisição.
+"""
+import asyncio
+import types
+from typing import Union, get_args, get_origin
+
+from beanie import Document, Link, PydanticObjectId
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+DESCRICAO_EXPAND = "Links a incluir por inteiro, separados por vírgula (ex.: imovel,inquilino)"
+
+
+def campos_link(model: type[BaseModel]) -> dict[str, type[Document]]:
+    """Campos do model do tipo Link[X] (ou Link[X] | None) e o Document de cada um."""
+    campos = {}
+    for nome, campo in model.model_fields.items():
+        anotacao = campo.annotation
+        if get_origin(anotacao) in (Union, types.UnionType):
+            anotacao = next((t for t in get_args(anotacao) if t is not type(None)), anotacao)
+        if get_origin(anotacao) is Link:
+            campos[nome] = get_args(anotacao)[0]
+    return campos
+
+
+def campos_expansao(model: type[Document], expand: str | None) -> dict[str, type[Document]]:
+    """
+    Valida o parâmetro expand contra os links do Document.
+
+    Returns:
+        Campo -> Document referenciado, apenas para os campos pedidos.
+
+    Raises:
+        HTTPException: Se algum valor não for um link do Document.
+    """
+    if not expand:
+        return {}
+    disponiveis = campos_link(model)
+    pedidos = [campo.strip() for campo in expand.split(",") if campo.strip()]
+    invalidos = [campo for campo in pedidos if campo not in disponiveis]
+    if invalidos:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Valores inválidos em expand: {', '.join(invalidos)} "
+                   f"(disponíveis: {', '.join(disponiveis)})",
+        )
+    return {campo: disponiveis[campo] for campo in pedidos}
+
+
+def _id_link(valor) -> PydanticObjectId | None:
+    if isinstance(valor, Link):
+        return valor.ref.id
+    if isinstance(valor, Document):
+        return valor.id
+    return None
+
+
+class CarregadorLinks:
+    """
+    Carregador em lote com escopo de requisição (injetado com Depends).
+    Cada documento referenciado é buscado no máximo uma vez por requisição.
+    """
+
+    def __init__(self):
+        self._carregados: dict[type[Document], dict[PydanticObjectId, Document]] = {}
+
+    async def carregar(self, model: type[Document], ids: set) -> dict[PydanticObjectId, Document]:
+        """Busca com um único $in os ids ainda não carregados do model."""
+        carregados = self._carregados.setdefault(model, {})
+        faltando = [id for id in ids if id not in carregados]
+        if faltando:
+            for documento in await model.find({"_id": {"$in": faltando}}).to_list():
+                carregados[documento.id] = documento
+        return carregados
+
+    async def expandir(self, documentos: list, campos: dict[str, type[Document]]) -> None:
+        """
+        Troca, nos documentos, os links dos campos pedidos pelos documentos
+        referenciados. Links para documentos inexistentes ficam como estão.
+        """
+        if not documentos or not campos:
+            return
+
+        async def expandir_campo(campo: str, model: type[Document]):
+            ids = {_id_link(getattr(doc, campo)) for doc in documentos} - {None}
+            encontrados = await self.carregar(model, ids)
+            for doc in documentos:
+                referenciado = encontrados.get(_id_link(getattr(doc, campo)))
+                if referenciado is not None:
+                    setattr(doc, campo, referenciado)
+
+        await asyncio.gather(*(expandir_campo(c, m) for c, m in campos.items()))
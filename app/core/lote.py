@@ -0,0 +1,108 @@
+"""
+Apoio às rotas de criação em lote (POST /<entidade>/bulk) e de busca em lote
+(POST /<entidade>/batch-get).
+"""
+from beanie import Document, PydanticObjectId
+from pymongo.errors import BulkWriteError
+
+from app.models.lote import ResultadoBuscaLote, ResultadoItemLote
+
+# Código de erro do MongoDB para violação de índice único
+DUPLICATE_KEY = 11000
+
+
+async def inserir_em_lote(
+    model: type[Document],
+    documentos: dict[int, Document],
+    mensagem_duplicado: str = "Registro duplicado",
+) -> dict[int, ResultadoItemLote]:
+    """
+    Insere os documentos com um único insert_many não ordenado.
+
+    Args:
+        model: Classe do Document de destino.
+        documentos: Documentos a inserir, indexados pela posição no lote recebido.
+        mensagem_duplicado: Mensagem usada quando um item viola um índice único.
+
+    Returns:
+        Resultado de cada item inserido (ou que falhou na escrita), pela posição.
+    """
+    if not documentos:
+        return {}
+
+    indices = list(documentos)
+    for documento in documentos.values():
+        # O id é gerado aqui para que cada item saiba seu _id mesmo com falhas parciais
+        documento.id = PydanticObjectId()
+
+    falhas: dict[int, ResultadoItemLote] = {}
+    try:
+        await model.insert_many(list(documentos.values()), ordered=False)
+    except BulkWriteError as e:
+        for erro in e.details.get("writeErrors", []):
+            indice = indices[erro["index"]]
+            duplicado = erro.get("code") == DUPLICATE_KEY
+            falhas[indice] = ResultadoItemLote(
+                indice=indice,
+                status="erro",
+                status_code=400 if duplicado else 500,
+                detail=mensagem_duplicado if duplicado else erro.get("errmsg"),
+            )
+
+    resultados = {
+        indice: ResultadoItemLote(indice=indice, status="criado", id=str(documento.id))
+        for indice, documento in documentos.items()
+        if indice not in falhas
+    }
+    resultados.update(falhas)
+    return resultados
+
+
+def erro_item(indice: int, status_code: int, detail: str) -> ResultadoItemLote:
+    """Resultado de um item rejeitado antes da escrita (mesmos códigos da rota individual)."""
+    return ResultadoItemLote(indice=indice, status="erro", status_code=status_code, detail=detail)
+
+
+def ordenar_resultados(resultados: dict[int, ResultadoItemLote]) -> list[ResultadoItemLote]:
+    """Devolve os resultados na ordem em que os itens foram enviados."""
+    return [resultados[indice] for indice in sorted(resultados)]
+
+
+async def buscar_em_lote(
+    model: type[Document], ids: list[str], nao_encontrado: str
+) -> list[ResultadoBuscaLote]:
+    """
+    Busca vários documentos pelo id com uma única consulta $in.
+
+    Args:
+        model: Classe do Document consultado.
+        ids: Ids recebidos, podendo ter repetidos e inválidos.
+        nao_encontrado: Mensagem dos ids válidos que não existem.
+
+    Returns:
+        Um resultado por id, na ordem enviada (encontrado com o documento,
+        nao_encontrado ou invalido).
+    """
+    validos = {id: PydanticObjectId(id) for id in ids if PydanticObjectId.is_valid(id)}
+    encontrados = {}
+    if validos:
+        cursor = model.get_motor_collection().find({"_id": {"$in": list(set(validos.values()))}})
+        encontrados = {documento["_id"]: documento async for documento in cursor}
+
+    resultados = []
+    for indice, id in enumerate(ids):
+        if id not in validos:
+            resultado = ResultadoBuscaLote(
+                indice=indice, id=id, status="invalido", status_code=400, detail="ID inválido"
+            )
+        elif validos[id] not in encontrados:
+            resultado = ResultadoBuscaLote(
+                indice=indice, id=id, status="nao_encontrado", status_code=404, detail=nao_encontrado
+            )
+        else:
+            resultado = ResultadoBuscaLote(
+                indice=indice, id=id, status="encontrado", status_code=200,
+                documento=model.model_validate(encontrados[validos[id]]),
+            )
+        resultados.append(resultado)
+    return resultados
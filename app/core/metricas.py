@@ -0,0 +1,240 @@
+"""
+Métricas de latência por rota e de comandos enviados ao MongoDB.
+
+O MiddlewareMetricas mede cada requisição e guarda, em uma ContextVar, o
+acumulador da requisição atual. O MonitorComandos (CommandListener do pymongo,
+registrado no init_db) soma nesse acumulador os comandos e o tempo gasto no
+banco. O Motor executa as operações em threads copiando o contexto, então a
+ContextVar chega até o listener.
+
+Tudo é exposto em formato texto do Prometheus em GET /metrics.
+"""
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from pymongo import monitoring
+
+from app.core import deteccao_n1
+
+# Limites (em segundos) dos buckets do histograma de latência
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Rótulo usado quando a requisição não casou com nenhuma rota
+ROTA_DESCONHECIDA = "desconhecida"
+
+
+@dataclass
+class MetricasRequisicao:
+    """Acumulador dos comandos MongoDB emitidos durante uma requisição."""
+    comandos: int = 0
+    tempo_db: float = 0.0
+    # Formatos dos comandos, preenchido só com o detector de N+1 ligado
+    formatos: Counter = field(default_factory=Counter)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def registrar(self, duracao: float) -> None:
+        with self._lock:
+            self.comandos += 1
+            self.tempo_db += duracao
+
+    def registrar_formato(self, formato: str) -> None:
+        with self._lock:
+            self.formatos[formato] += 1
+
+
+_requisicao_atual: ContextVar[MetricasRequisicao | None] = ContextVar(
+    "metricas_requisicao", default=None
+)
+
+
+class Histograma:
+    """Histograma cumulativo no formato do Prometheus."""
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS_LATENCIA):
+        self.buckets = buckets
+        self.contagens = [0] * len(buckets)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float) -> None:
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.contagens[i] += 1
+        self.soma += valor
+        self.total += 1
+
+
+class RegistroMetricas:
+    """Armazena as séries por rota e por comando e gera o texto do /metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencias: dict[tuple[str, str, str], Histograma] = {}
+        self._comandos_rota: dict[tuple[str, str, str], int] = {}
+        self._tempo_db_rota: dict[tuple[str, str, str], float] = {}
+        self._comandos: dict[tuple[str, str], int] = {}
+        self._tempo_comandos: dict[str, float] = {}
+
+    def registrar_requisicao(
+        self, metodo: str, rota: str, status: int, duracao: float, metricas: MetricasRequisicao
+    ) -> None:
+        chave = (metodo, rota, str(status))
+        with self._lock:
+            self._latencias.setdefault(chave, Histograma()).observar(duracao)
+            self._comandos_rota[chave] = self._comandos_rota.get(chave, 0) + metricas.comandos
+            self._tempo_db_rota[chave] = self._tempo_db_rota.get(chave, 0.0) + metricas.tempo_db
+
+    def registrar_comando(self, comando: str, sucesso: bool, duracao: float) -> None:
+        chave = (comando, "ok" if sucesso else "erro")
+        with self._lock:
+            self._comandos[chave] = self._comandos.get(chave, 0) + 1
+            self._tempo_comandos[comando] = self._tempo_comandos.get(comando, 0.0) + duracao
+
+    def renderizar(self) -> str:
+        """Gera o texto no formato de exposição do Prometheus (versão 0.0.4)."""
+        linhas = []
+        with self._lock:
+            linhas += [
+                "# HELP http_request_duration_seconds Latência das requisições HTTP por rota.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (metodo, rota, status), hist in sorted(self._latencias.items()):
+                rotulos = _rotulos(method=metodo, route=rota, status=status)
+                for limite, contagem in zip(hist.buckets, hist.contagens):
+                    linhas.append(
+                        f"http_request_duration_seconds_bucket{{{rotulos},le=\"{limite}\"}} {contagem}"
+                    )
+                linhas.append(f"http_request_duration_seconds_bucket{{{rotulos},le=\"+Inf\"}} {hist.total}")
+                linhas.append(f"http_request_duration_seconds_sum{{{rotulos}}} {hist.soma}")
+                linhas.append(f"http_request_duration_seconds_count{{{rotulos}}} {hist.total}")
+
+            linhas += [
+                "# HELP http_request_mongo_commands_total Comandos MongoDB emitidos pelas requisições de cada rota.",
+                "# TYPE http_request_mongo_commands_total counter",
+            ]
+            for (metodo, rota, status), total in sorted(self._comandos_rota.items()):
+                rotulos = _rotulos(method=metodo, route=rota, status=status)
+                linhas.append(f"http_request_mongo_commands_total{{{rotulos}}} {total}")
+
+            linhas += [
+                "# HELP http_request_mongo_seconds_total Tempo gasto no MongoDB pelas requisições de cada rota.",
+                "# TYPE http_request_mongo_seconds_total counter",
+            ]
+            for (metodo, rota, status), total in sorted(self._tempo_db_rota.items()):
+                rotulos = _rotulos(method=metodo, route=rota, status=status)
+                linhas.append(f"http_request_mongo_seconds_total{{{rotulos}}} {total}")
+
+            linhas += [
+                "# HELP mongo_commands_total Comandos MongoDB por nome e resultado (inclui os de fora de requisições).",
+                "# TYPE mongo_commands_total counter",
+            ]
+            for (comando, resultado), total in sorted(self._comandos.items()):
+                linhas.append(
+                    f"mongo_commands_total{{{_rotulos(command=comando, result=resultado)}}} {total}"
+                )
+
+            linhas += [
+                "# HELP mongo_command_seconds_total Tempo total por nome de comando MongoDB.",
+                "# TYPE mongo_command_seconds_total counter",
+            ]
+            for comando, total in sorted(self._tempo_comandos.items()):
+                linhas.append(f"mongo_command_seconds_total{{{_rotulos(command=comando)}}} {total}")
+        return "\n".join(linhas) + "\n"
+
+
+def _rotulos(**rotulos: str) -> str:
+    """Formata os rótulos escapando barras, aspas e quebras de linha."""
+    def escapar(valor: str) -> str:
+        return valor.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+    return ",".join(f"{nome}=\"{escapar(valor)}\"" for nome, valor in rotulos.items())
+
+
+registro = RegistroMetricas()
+
+
+class MonitorComandos(monitoring.CommandListener):
+    """Listener do pymongo que contabiliza os comandos na requisição atual."""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if not deteccao_n1.ativo():
+            return
+        metricas = _requisicao_atual.get()
+        if metricas is None:
+            return
+        formato = deteccao_n1.formato_comando(event.command_name, event.command)
+        if formato is not None:
+            metricas.registrar_formato(formato)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._registrar(event, sucesso=True)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._registrar(event, sucesso=False)
+
+    def _registrar(self, event, sucesso: bool) -> None:
+        duracao = event.duration_micros / 1_000_000
+        registro.registrar_comando(event.command_name, sucesso, duracao)
+        metricas = _requisicao_atual.get()
+        if metricas is not None:
+            metricas.registrar(duracao)
+
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI que mede a latência de cada requisição HTTP.
+
+    A medição vai até o último pedaço do corpo ser enviado, então respostas em
+    streaming (como o NDJSON do dashboard) contam o tempo de geração inteiro.
+    O rótulo da rota é o template (ex.: /imoveis/{id}), não o caminho recebido.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metricas = MetricasRequisicao()
+        token = _requisicao_atual.set(metricas)
+        inicio = time.perf_counter()
+        status = 500
+        registrado = False
+
+        def finalizar():
+            nonlocal registrado
+            if registrado:
+                return
+            registrado = True
+            rota = scope.get("route")
+            registro.registrar_requisicao(
+                scope["method"],
+                getattr(rota, "path", ROTA_DESCONHECIDA),
+                status,
+                time.perf_counter() - inicio,
+                metricas,
+            )
+
+        async def send_com_metricas(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+            await send(mensagem)
+            if mensagem["type"] == "http.response.body" and not mensagem.get("more_body", False):
+                finalizar()
+
+        try:
+            await self.app(scope, receive, send_com_metricas)
+        finally:
+            finalizar()
+            _requisicao_atual.reset(token)
+
+        if metricas.formatos:
+            rota = scope.get("route")
+            deteccao_n1.verificar(
+                scope["method"], getattr(rota, "path", ROTA_DESCONHECIDA), metricas.formatos
+            )
@@ -0,0 +1,96 @@
+"""
+Paginação por cursor (keyset) para as rotas de listagem.
+
+O cursor é um token opaco com o valor da chave de ordenação e o _id do último
+documento da página. A próxima página é buscada com um filtro "depois deste
+ponto" em vez de .skip(), então o custo não cresce com a profundidade.
+"""
+import base64
+from datetime import date, datetime
+from typing import Any
+
+from beanie import PydanticObjectId
+from bson import json_util
+from fastapi import HTTPException, Response
+
+# Header em que o token da próxima página é devolvido nas listagens
+HEADER_PROXIMO_CURSOR = "X-Next-Cursor"
+
+
+def _valor_ordenacao(valor: Any) -> Any:
+    """Converte o valor do campo para o tipo armazenado no MongoDB (date vira datetime)."""
+    if isinstance(valor, date) and not isinstance(valor, datetime):
+        return datetime.combine(valor, datetime.min.time())
+    return valor
+
+
+def codificar_cursor(id: PydanticObjectId, valor: Any = None) -> str:
+    """Gera o token opaco a partir do _id (e do valor da chave de ordenação, se houver)."""
+    payload = json_util.dumps({"id": id, "k": _valor_ordenacao(valor)})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(token: str) -> dict:
+    """
+    Lê um token gerado por codificar_cursor.
+
+    Raises:
+        HTTPException: Se o token estiver malformado.
+    """
+    try:
+        padding = "=" * (-len(token) % 4)
+        dados = json_util.loads(base64.urlsafe_b64decode(token + padding))
+        return {"id": PydanticObjectId(dados["id"]), "k": dados.get("k")}
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def filtro_cursor(token: str, campo: str | None = None, direcao: int = 1) -> dict:
+    """
+    Monta o filtro que seleciona os documentos posteriores ao cursor.
+
+    Args:
+        token: Cursor recebido do cliente.
+        campo: Chave de ordenação ativa (None quando a ordenação é só por _id).
+        direcao: 1 para ascendente, -1 para descendente.
+
+    Returns:
+        Filtro MongoDB compatível com a ordenação (campo, _id).
+    """
+    cursor = decodificar_cursor(token)
+    op = "$gt" if direcao == 1 else "$lt"
+    if campo is None:
+        return {"_id": {op: cursor["id"]}}
+    return {
+        "$or": [
+            {campo: {op: cursor["k"]}},
+            {campo: cursor["k"], "_id": {op: cursor["id"]}},
+        ]
+    }
+
+
+def ordenacao(campo: str | None = None, direcao: int = 1) -> list[tuple[str, int]]:
+    """Ordenação estável usada junto com o cursor: chave ativa e _id como desempate."""
+    if campo is None:
+        return [("_id", direcao)]
+    return [(campo, direcao), ("_id", direcao)]
+
+
+def definir_proximo_cursor(
+    response: Response,
+    documentos: list,
+    limit: int,
+    campo: str | None = None,
+) -> None:
+    """
+    Escreve no header o cursor da próxima página quando a página atual veio cheia.
+    Aceita tanto Documents quanto dicts crus vindos de um aggregation pipeline.
+    """
+    if not documentos or limit <= 0 or len(documentos) < limit:
+        return
+    ultimo = documentos[-1]
+    if isinstance(ultimo, dict):
+        id, valor = ultimo["_id"], ultimo.get(campo) if campo else None
+    else:
+        id, valor = ultimo.id, getattr(ultimo, campo) if campo else None
+    response.headers[HEADER_PROXIMO_CURSOR] = codificar_cursor(id, valor)
@@ -0,0 +1,82 @@
+"""
+Projeção de campos (parâmetro fields=) nas rotas de leitura.
+
+O cliente informa os campos desejados separados por vírgula; a lista vira uma
+projeção no MongoDB (via .project() do Beanie) e os documentos são lidos em um
+model enxuto gerado a partir do Document, com apenas o _id e esses campos.
+Os models enxutos são gerados uma vez por combinação de campos e reaproveitados.
+"""
+import functools
+from typing import Iterable
+
+from beanie import Document, PydanticObjectId
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field, create_model
+
+from app.core.paginacao import HEADER_PROXIMO_CURSOR
+
+DESCRICAO_FIELDS = (
+    "Campos a retornar, separados por vírgula (ex.: apelido_imovel,valor_aluguel_base). "
+    "O _id sempre é retornado."
+)
+
+# Campos internos do Document que não podem ser pedidos
+_CAMPOS_INTERNOS = {"id", "revision_id"}
+
+
+@functools.cache
+def _modelo_parcial(model: type[Document], campos: tuple[str, ...]) -> type[BaseModel]:
+    """Gera o model enxuto com _id e os campos pedidos, com os tipos do Document."""
+    definicoes = {
+        campo: (model.model_fields[campo].annotation | None, None) for campo in campos
+    }
+    return create_model(
+        f"{model.__name__}Parcial",
+        id=(PydanticObjectId | None, Field(default=None, alias="_id")),
+        **definicoes,
+    )
+
+
+def modelo_projecao(
+    model: type[Document], fields: str | None, extras: Iterable[str] = ()
+) -> type[BaseModel] | None:
+    """
+    Valida o parâmetro fields e devolve o model enxuto correspondente.
+
+    Args:
+        model: Document consultado pela rota.
+        fields: Valor recebido na query string (None quando não informado).
+        extras: Campos incluídos junto com os de fields (ex.: os pedidos em expand).
+
+    Returns:
+        Model a ser passado para .project(), ou None se fields não foi informado.
+
+    Raises:
+        HTTPException: Se algum campo não existir no Document.
+    """
+    if not fields:
+        return None
+    pedidos = [campo.strip() for campo in fields.split(",") if campo.strip()] + list(extras)
+    campos = sorted({c for c in pedidos if c not in ("id", "_id")})
+    invalidos = [c for c in campos if c not in model.model_fields or c in _CAMPOS_INTERNOS]
+    if invalidos:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos inválidos em fields: {', '.join(invalidos)}",
+        )
+    return _modelo_parcial(model, tuple(campos))
+
+
+def resposta_projetada(conteudo: BaseModel | list[BaseModel] | dict, response: Response | None = None) -> JSONResponse:
+    """
+    Serializa documentos lidos com projeção, sem passar pelo response_model da rota
+    (que exige o documento completo). Repassa os headers de cursor e ETag, se definidos.
+    """
+    headers = {}
+    if response is not None:
+        for nome in (HEADER_PROXIMO_CURSOR, "ETag"):
+            if nome in response.headers:
+                headers[nome] = response.headers[nome]
+    return JSONResponse(content=jsonable_encoder(conteudo, by_alias=True), headers=headers)
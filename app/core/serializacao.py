@@ -0,0 +1,116 @@
+"""
+Serialização rápida das listagens (opcional, Settings.SERIALIZACAO_RAPIDA).
+
+No caminho normal cada documento vindo do MongoDB vira um Document do Beanie,
+o FastAPI o valida de novo pelo response_model e só então gera o JSON. Aqui os
+documentos crus do cursor são convertidos por um conversor montado uma única
+vez por Document (a partir dos tipos dos campos) e codificados com o
+pydantic_core.to_json, o mesmo codificador usado pelo FastAPI. O JSON gerado é
+idêntico, byte a byte, ao da rota sem o atalho.
+"""
+import functools
+import types
+from datetime import date, datetime
+from typing import Any, Callable, Union, get_args, get_origin
+
+from beanie import Document, Link, PydanticObjectId
+from bson import DBRef
+from fastapi import Response
+from pydantic_core import to_json
+
+from app.core.paginacao import HEADER_PROXIMO_CURSOR
+
+
+def _sem_optional(anotacao: Any) -> Any:
+    """Remove o None de anotações como X | None."""
+    if get_origin(anotacao) in (Union, types.UnionType):
+        tipos = [t for t in get_args(anotacao) if t is not type(None)]
+        if len(tipos) == 1:
+            return tipos[0]
+    return anotacao
+
+
+def _link(valor: Any) -> Any:
+    if isinstance(valor, DBRef):
+        return {"id": str(valor.id), "collection": valor.collection}
+    return valor
+
+
+def _data(valor: Any) -> Any:
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+def _float(valor: Any) -> Any:
+    return float(valor) if isinstance(valor, int) and not isinstance(valor, bool) else valor
+
+
+def _object_id(valor: Any) -> Any:
+    return str(valor)
+
+
+def _conversor(anotacao: Any) -> Callable[[Any], Any] | None:
+    """Escolhe a conversão BSON -> JSON equivalente à do model (None = sem conversão)."""
+    tipo = _sem_optional(anotacao)
+    if get_origin(tipo) is Link:
+        return _link
+    if tipo is PydanticObjectId:
+        return _object_id
+    if tipo is date:
+        return _data
+    if tipo is float:
+        return _float
+    return None
+
+
+class SerializadorRapido:
+    """Conversor pré-compilado dos documentos crus de um Document para JSON."""
+
+    def __init__(self, model: type[Document]):
+        self.campos = []
+        for nome, campo in model.model_fields.items():
+            if campo.exclude:
+                continue
+            origem = campo.alias or nome
+            padrao = None if campo.is_required() else campo.get_default(call_default_factory=True)
+            self.campos.append((origem, _conversor(campo.annotation), padrao))
+
+    def converter(self, documento: dict) -> dict:
+        convertido = {}
+        for chave, conversor, padrao in self.campos:
+            valor = documento.get(chave, padrao)
+            convertido[chave] = conversor(valor) if conversor and valor is not None else valor
+        return convertido
+
+    def json(self, documentos: list[dict]) -> bytes:
+        return to_json([self.converter(documento) for documento in documentos])
+
+
+@functools.cache
+def serializador(model: type[Document]) -> SerializadorRapido:
+    return SerializadorRapido(model)
+
+
+async def listar_crus(
+    model: type[Document], filtros: dict, sort: list[tuple[str, int]], skip: int, limit: int
+) -> list[dict]:
+    """Busca os documentos direto pelo Motor, sem instanciar o Document."""
+    cursor = model.get_motor_collection().find(filtros, sort=sort, skip=skip, limit=limit)
+    return await cursor.to_list(length=limit)
+
+
+def resposta_rapida(
+    model: type[Document], documentos: list[dict], response: Response | None = None, total: int | None = None
+) -> Response:
+    """
+    Monta a resposta JSON dos documentos crus, repassando o header de cursor.
+    Com total, responde {items, total} (ver app/core/contagem.py).
+    """
+    headers = {}
+    if response is not None and HEADER_PROXIMO_CURSOR in response.headers:
+        headers[HEADER_PROXIMO_CURSOR] = response.headers[HEADER_PROXIMO_CURSOR]
+    if total is None:
+        conteudo = serializador(model).json(documentos)
+    else:
+        conversor = serializador(model).converter
+        conteudo = to_json({"items": [conversor(documento) for documento in documentos], "total": total})
+    return Response(content=conteudo, media_type="application/json", headers=headers)
@@ -1,20 +1,150 @@
+import asyncio
+import importlib.util
+from contextlib import asynccontextmanager
 from beanie import init_beanie
 from motor.motor_asyncio import AsyncIOMotorClient
+from app.core.cache import cache
+from app.core.cache_entidades import cache_entidades
 from app.core.config import settings
+from app.core.metricas import MonitorComandos
 from app.models.proprietario import Proprietario
 from app.models.imovel import Imovel
 from app.models.inquilino import Inquilino
 from app.models.contrato import Contrato
+from app.models.estatisticas import Estatisticas
+from app.models.vencimento import ExecucaoVencimento
 
+DOCUMENT_MODELS = [Proprietario, Imovel, Inquilino, Contrato, Estatisticas, ExecucaoVencimento]
 
-async def init_db():
+# Client compartilhado pelo app inteiro; criado no init_db e fechado no close_db
+_client: AsyncIOMotorClient | None = None
+
+
+async def relatorio_indices() -> dict[str, dict[str, list[str]]]:
+    """
+    Compara os índices declarados em cada Document com os existentes no banco.
+
+    Returns:
+        Dicionário por coleção com as listas de índices "faltando" e "extras".
+    """
+    relatorio = {}
+    for model in DOCUMENT_MODELS:
+        declarados = {idx.name for idx in model.get_settings().indexes or []}
+        info = await model.get_motor_collection().index_information()
+        existentes = {nome for nome in info if nome != "_id_"}
+        relatorio[model.get_settings().name] = {
+            "faltando": sorted(declarados - existentes),
+            "extras": sorted(existentes - declarados),
+        }
+    return relatorio
+
+
+@asynccontextmanager
+async def transacao():
+    """
+    Abre uma sessão com transação se Settings.MONGODB_TRANSACOES estiver ligado.
+
+    Produz a sessão a ser repassada às operações, ou None quando as transações
+    estão desligadas (cada operação é então atômica apenas individualmente).
+    Uma exceção dentro do bloco aborta a transação.
+    """
+    if not settings.MONGODB_TRANSACOES:
+        yield None
+        return
+    async with await get_client().start_session() as sessao:
+        async with sessao.start_transaction():
+            yield sessao
+
+
+def _compressores_disponiveis() -> list[str]:
+    """
+    Filtra MONGODB_COMPRESSORS pelos módulos instalados (zstd precisa do
+    "zstandard" e snappy do "python-snappy"; zlib já vem com o Python).
+    """
+    modulos = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+    pedidos = [c.strip() for c in settings.MONGODB_COMPRESSORS.split(",") if c.strip()]
+    return [c for c in pedidos if c in modulos and importlib.util.find_spec(modulos[c])]
+
+
+def criar_cliente() -> AsyncIOMotorClient:
+    """Cria um AsyncIOMotorClient com pool, compressão e timeouts vindos do Settings."""
+    return AsyncIOMotorClient(
+        settings.MONGODB_URL,
+        maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+        compressors=_compressores_disponiveis() or None,
+        serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=settings.MONGODB_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=settings.MONGODB_SOCKET_TIMEOUT_MS,
+        # O listener contabiliza os comandos de cada requisição para o /metrics
+        event_listeners=[MonitorComandos()],
+    )
+
+
+def get_client() -> AsyncIOMotorClient:
+    """
+    Devolve o client compartilhado criado pelo init_db.
+
+    Raises:
+        RuntimeError: Se o init_db ainda não foi executado.
+    """
+    if _client is None:
+        raise RuntimeError("Banco não inicializado: chame init_db() antes")
+    return _client
+
+
+async def aquecer_pool(client: AsyncIOMotorClient) -> None:
+    """
+    Abre MONGODB_MIN_POOL_SIZE conexões com pings simultâneos, para que as
+    primeiras requisições não paguem o custo de conexão e autenticação.
+    """
+    quantidade = max(settings.MONGODB_MIN_POOL_SIZE, 1)
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(quantidade)))
+
+
+async def init_db() -> AsyncIOMotorClient:
+    """
+    Conecta ao MongoDB, inicializa o Beanie e aquece o pool de conexões.
+
+    Returns:
+        O client compartilhado, que deve ser fechado com close_db() ao encerrar.
+
+    Raises:
+        Exception: Falhas de conexão são repassadas, impedindo o app de subir
+            sem banco.
+    """
+    global _client
+    client = criar_cliente()
     try:
-        client = AsyncIOMotorClient(settings.MONGODB_URL)
+        # Falha rápido (serverSelectionTimeoutMS) se o banco estiver inacessível
+        await aquecer_pool(client)
+        # O init_beanie cria os índices declarados em Settings.indexes
+        # e, se permitido, remove os que não estão mais declarados
         await init_beanie(
             database=client[settings.DATABASE_NAME],
-            document_models=[Proprietario, Imovel, Inquilino, Contrato],
-
+            document_models=DOCUMENT_MODELS,
+            allow_index_dropping=settings.MONGODB_DROP_INDICES,
         )
-        print("Conexão com MongoDB estabelecida com sucesso!")
+        await cache.configurar(client[settings.DATABASE_NAME])
+        cache_entidades.configurar()
     except Exception as e:
+        client.close()
         print(f"FALHA NA CONEXÃO COM O BANCO: {e}")
+        raise
+    _client = client
+    print("Conexão com MongoDB estabelecida com sucesso!")
+
+    for colecao, diff in (await relatorio_indices()).items():
+        if diff["faltando"]:
+            print(f"[índices] {colecao}: faltando {diff['faltando']}")
+        if diff["extras"]:
+            print(f"[índices] {colecao}: extras {diff['extras']}")
+    return client
+
+
+def close_db() -> None:
+    """Fecha o client compartilhado (chamado no encerramento do app)."""
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
@@ -1,13 +1,32 @@
+import asyncio
 from fastapi import FastAPI
-from app.database.database import init_db
+from app.core.config import settings
+from app.database.database import close_db, init_db
+from app.services import vencimentos
 from contextlib import asynccontextmanager
-from app.api import proprietario, imovel, inquilino, contrato, dashboard, consultas
+from app.api import proprietario, imovel, inquilino, contrato, dashboard, consultas, metricas
+from app.core.metricas import MiddlewareMetricas
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Gerencia o ciclo de vida da aplicação, conectando ao banco ao iniciar."""
-    await init_db()
+    """
+    Gerencia o ciclo de vida da aplicação: o client do MongoDB é criado (e o pool
+    aquecido) antes de aceitar requisições, fica em app.state.mongo_client e é
+    fechado no encerramento. O encerramento agendado de contratos vencidos roda
+    em uma tarefa do processo, cancelada antes de fechar o client.
+    """
+    app.state.mongo_client = await init_db()
+    agendamento = None
+    if settings.VENCIMENTO_INTERVALO_MINUTOS > 0:
+        agendamento = asyncio.create_task(vencimentos.agendar())
     yield
+    if agendamento is not None:
+        agendamento.cancel()
+        try:
+            await agendamento
+        except asyncio.CancelledError:
+            pass
+    close_db()
 
 app = FastAPI(
     title="Gestor Imobiliário NoSQL",
@@ -15,9 +34,12 @@ app = FastAPI(
     description="API para o Trabalho Prático de Persistência - MongoDB"
 )
 
+app.add_middleware(MiddlewareMetricas)
+
 app.include_router(proprietario.router)
 app.include_router(imovel.router)
 app.include_router(inquilino.router)
 app.include_router(contrato.router)
 app.include_router(dashboard.router)
-app.include_router(consultas.router)
\ No newline at end of file
+app.include_router(consultas.router)
+app.include_router(metricas.router)
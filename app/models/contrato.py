@@ -1,6 +1,8 @@
 from datetime import date
+from typing import Literal
 from beanie import Document, Link
-from pydantic import BaseModel, Field
+from pymongo import ASCENDING, IndexModel
+from pydantic import BaseModel, Field, field_validator
 from .inquilino import Inquilino
 from .imovel import Imovel
 
@@ -15,17 +17,45 @@ class ContratoCreate(BaseModel):
 
 
 class ContratoUpdate(BaseModel):
-    """Schema para atualização parcial de contrato."""
+    """
+    Schema para atualização parcial de contrato.
+    Tem as mesmas restrições do Contrato: o PUT grava antes de montar o model,
+    então um valor inválido precisa ser recusado aqui (422), antes da escrita.
+    """
     data_inicio: date | None = None
     data_fim: date | None = None
-    valor_aluguel: float | None = None
-    status: str | None = None
+    valor_aluguel: float | None = Field(None, gt=0)
+    status: Literal["Ativo", "Encerrado", "Cancelado"] | None = None
+
+    @field_validator("data_inicio", "data_fim", "valor_aluguel", "status")
+    @classmethod
+    def nao_nulo(cls, valor):
+        """Omitir o campo mantém o valor atual; null explícito não é aceito."""
+        if valor is None:
+            raise ValueError("O campo não pode ser nulo")
+        return valor
+
+
+class ResumoImovel(BaseModel):
+    """Cópia dos campos do imóvel mais lidos junto com o contrato."""
+    apelido_imovel: str
+    tipo_imovel: str
+    endereco: str
+
+
+class ResumoInquilino(BaseModel):
+    """Cópia dos campos do inquilino mais lidos junto com o contrato."""
+    nome: str
 
 
 class Contrato(Document):
     """
     Documento que representa um contrato de aluguel.
     Estabelece a relação Muitos-para-Muitos entre Inquilino e Imóvel.
+
+    Os resumos são gravados na criação e mantidos por app/services/resumos.py,
+    para que as listagens não precisem resolver os links. Contratos gravados
+    antes deles ficam com None até o resumos.reconstruir().
     """
     inquilino: Link[Inquilino]
     imovel: Link[Imovel]
@@ -33,6 +63,36 @@ class Contrato(Document):
     data_fim: date
     valor_aluguel: float = Field(gt=0)
     status: str = "Ativo"  # Ativo, Encerrado, Cancelado
+    resumo_imovel: ResumoImovel | None = None
+    resumo_inquilino: ResumoInquilino | None = None
+    # Mês do último reajuste anual (dia 1), gravado pelo app/services/reajuste.py
+    ultimo_reajuste: date | None = None
+    # Mês de data_inicio, gravado junto com ela para o reajuste filtrar pelo índice.
+    # Contratos anteriores ao campo são preenchidos pelo app/services/reajuste.py
+    mes_aniversario: int | None = Field(None, ge=1, le=12)
 
     class Settings:
-        name = "contratos"
\ No newline at end of file
+        name = "contratos"
+        indexes = [
+            IndexModel([("inquilino.$id", ASCENDING)], name="idx_contrato_inquilino"),
+            IndexModel(
+                [("imovel.$id", ASCENDING), ("status", ASCENDING)],
+                name="idx_contrato_imovel_status",
+            ),
+            IndexModel(
+                [("status", ASCENDING), ("_id", ASCENDING)],
+                name="idx_contrato_status_id",
+            ),
+            IndexModel(
+                [("data_fim", ASCENDING), ("_id", ASCENDING)],
+                name="idx_contrato_data_fim_id",
+            ),
+            IndexModel(
+                [("status", ASCENDING), ("data_fim", ASCENDING), ("_id", ASCENDING)],
+                name="idx_contrato_status_data_fim",
+            ),
+            IndexModel(
+                [("status", ASCENDING), ("mes_aniversario", ASCENDING), ("data_inicio", ASCENDING)],
+                name="idx_contrato_status_mes_aniversario",
+            ),
+        ]
\ No newline at end of file
@@ -0,0 +1,28 @@
+from beanie import Document
+from pydantic import BaseModel
+
+# Há um único documento de estatísticas, sempre com este _id
+ID_ESTATISTICAS = "geral"
+
+
+class ContagemTipo(BaseModel):
+    """Quantidade de imóveis de um tipo (o tipo fica no valor, nunca no caminho do campo)."""
+    tipo: str
+    quantidade: int = 0
+
+
+class Estatisticas(Document):
+    """
+    Contadores materializados do dashboard.
+    Mantidos com $inc pelas rotas de escrita de imóveis e contratos.
+    """
+    id: str = ID_ESTATISTICAS
+    imoveis_por_tipo: list[ContagemTipo] = []
+    receita_mensal_atual: float = 0.0
+
+    def quantidades_por_tipo(self) -> dict[str, int]:
+        """Contadores de imóveis indexados pelo tipo."""
+        return {item.tipo: item.quantidade for item in self.imoveis_por_tipo}
+
+    class Settings:
+        name = "estatisticas"
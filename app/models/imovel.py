@@ -1,4 +1,5 @@
 from beanie import Document, Link
+from pymongo import ASCENDING, TEXT, IndexModel
 from pydantic import BaseModel, Field
 from .proprietario import Proprietario
 
@@ -13,10 +14,10 @@ class ImovelCreate(BaseModel):
     id_proprietario: str # Recebe a string do ID para buscar depois
 
 class ImovelUpdate(BaseModel):
-    apelido_imovel: str | None = None
+    apelido_imovel: str | None = Field(None, min_length=3, max_length=100)
     descricao: str | None = None
     endereco: str | None = None
-    valor_aluguel_base: float | None = None
+    valor_aluguel_base: float | None = Field(None, gt=0)
     tipo_imovel: str | None= None
     status: str | None = None
 
@@ -32,4 +33,15 @@ class Imovel(Document):
     proprietario: Link[Proprietario]
 
     class Settings:
-        name = "imoveis"
\ No newline at end of file
+        name = "imoveis"
+        indexes = [
+            IndexModel([("proprietario.$id", ASCENDING)], name="idx_imovel_proprietario"),
+            IndexModel([("status", ASCENDING)], name="idx_imovel_status"),
+            # Índice de texto para busca por palavras (sem acento/caixa, com radicais em português)
+            IndexModel(
+                [("apelido_imovel", TEXT), ("endereco", TEXT), ("descricao", TEXT)],
+                name="idx_imovel_texto",
+                weights={"apelido_imovel": 10, "endereco": 5, "descricao": 1},
+                default_language="portuguese",
+            ),
+        ]
\ No newline at end of file
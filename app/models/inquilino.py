@@ -1,4 +1,5 @@
 from beanie import Document
+from pymongo import ASCENDING, IndexModel
 from pydantic import BaseModel, Field
 
 
@@ -12,12 +13,12 @@ class InquilinoCreate(BaseModel):
 
 
 class InquilinoUpdate(BaseModel):
-    """Schema para atualização parcial de inquilino."""
-    nome: str | None = None
-    cpf: str | None = None
+    """Schema para atualização parcial de inquilino (mesmas restrições da criação)."""
+    nome: str | None = Field(None, min_length=3, max_length=200)
+    cpf: str | None = Field(None, min_length=11, max_length=14)
     email: str | None = None
     telefone: str | None = None
-    renda_mensal: float | None = None
+    renda_mensal: float | None = Field(None, gt=0)
 
 
 class Inquilino(Document):
@@ -30,4 +31,7 @@ class Inquilino(Document):
 
     class Settings:
         name = "inquilinos"
+        indexes = [
+            IndexModel([("cpf", ASCENDING)], name="idx_inquilino_cpf", unique=True),
+        ]
 
@@ -0,0 +1,24 @@
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class ResultadoItemLote(BaseModel):
+    """Resultado de um item de uma operação em lote, na mesma posição do envio."""
+    indice: int
+    status: str  # criado, erro
+    id: str | None = None
+    status_code: int | None = None
+    detail: str | None = None
+
+
+class ResultadoBuscaLote(BaseModel, Generic[T]):
+    """Resultado de um id de uma busca em lote, na mesma posição do envio."""
+    indice: int
+    id: str
+    status: str  # encontrado, nao_encontrado, invalido
+    status_code: int
+    detail: str | None = None
+    documento: T | None = None
@@ -1,4 +1,5 @@
 from beanie import Document
+from pymongo import ASCENDING, IndexModel
 from pydantic import BaseModel, Field
 
 class ProprietarioCreate(BaseModel):
@@ -9,8 +10,8 @@ class ProprietarioCreate(BaseModel):
     endereco: str | None = None
 
 class ProprietarioUpdate(BaseModel):
-    nome: str | None = None
-    cpf: str | None = None
+    nome: str | None = Field(None, min_length=3, max_length=200)
+    cpf: str | None = Field(None, min_length=11, max_length=14)
     email: str | None = None
     telefone: str | None = None
     endereco: str | None = None
@@ -23,4 +24,7 @@ class Proprietario(Document):
     endereco: str | None = None
 
     class Settings:
-        name = "proprietarios"
\ No newline at end of file
+        name = "proprietarios"
+        indexes = [
+            IndexModel([("cpf", ASCENDING)], name="idx_proprietario_cpf"),
+        ]
\ No newline at end of file
@@ -0,0 +1,34 @@
+from datetime import date
+
+from pydantic import BaseModel, Field, field_validator
+
+
+class ReajusteCreate(BaseModel):
+    """Parâmetros do reajuste anual em massa dos contratos ativos."""
+    indice: str = Field(description="Índice aplicado (ex.: IGP-M, IPCA)")
+    percentual: float = Field(gt=-100, description="Variação do índice em %, pode ser negativa")
+    ano: int = Field(ge=2000, description="Ano do reajuste (até o ano que vem)")
+    mes: int = Field(ge=1, le=12, description="Mês de aniversário (mês de início) dos contratos")
+    simular: bool = Field(False, description="Só calcula os totais, sem alterar os contratos")
+
+    @field_validator("ano")
+    @classmethod
+    def ano_ate_o_proximo(cls, ano: int) -> int:
+        """Limite lido a cada validação, para valer também em processos de longa duração."""
+        limite = date.today().year + 1
+        if ano > limite:
+            raise ValueError(f"O ano deve ser no máximo {limite}")
+        return ano
+
+
+class ResultadoReajuste(BaseModel):
+    """Totais de um reajuste em massa (previstos, quando simulado)."""
+    indice: str
+    percentual: float
+    ano: int
+    mes: int
+    simulado: bool
+    contratos: int
+    receita_anterior: float
+    receita_nova: float
+    delta_receita: float
@@ -0,0 +1,27 @@
+from datetime import datetime
+from beanie import Document
+from pymongo import DESCENDING, IndexModel
+
+
+class ExecucaoVencimento(Document):
+    """
+    Resumo de uma execução do encerramento automático de contratos vencidos.
+    Gravado ao fim de cada execução, agendada ou disparada pela rota.
+    """
+    origem: str  # agendada, manual, linha_de_comando
+    inicio: datetime
+    fim: datetime | None = None
+    data_corte: datetime
+    lotes: int = 0
+    contratos_encerrados: int = 0
+    imoveis_liberados: int = 0
+    receita_descontada: float = 0.0
+    # A receita foi recalculada do zero porque outra escrita encerrou contratos do lote
+    receita_reconciliada: bool = False
+    erro: str | None = None
+
+    class Settings:
+        name = "execucoes_vencimento"
+        indexes = [
+            IndexModel([("inicio", DESCENDING)], name="idx_execucao_vencimento_inicio"),
+        ]
@@ -0,0 +1,161 @@
+"""
+Manutenção incremental das estatísticas do dashboard.
+
+As rotas de escrita chamam as funções de incremento logo após gravar, e o
+dashboard apenas lê o documento de contadores. A reconciliação recalcula tudo
+a partir das coleções e informa a diferença encontrada.
+
+Uso pela linha de comando:
+    uv run python -m app.services.estatisticas
+"""
+import asyncio
+from app.database.database import init_db
+from app.models.contrato import Contrato
+from app.models.estatisticas import ContagemTipo, Estatisticas, ID_ESTATISTICAS
+from app.models.imovel import Imovel
+
+
+async def _incrementar(campos: dict[str, float]) -> None:
+    """
+    Aplica um $inc atômico no documento de contadores.
+    Se o documento ainda não existir nada é feito: a próxima leitura o reconstrói.
+    """
+    campos = {campo: valor for campo, valor in campos.items() if valor}
+    if not campos:
+        return
+    await Estatisticas.get_motor_collection().update_one(
+        {"_id": ID_ESTATISTICAS}, {"$inc": campos}
+    )
+
+
+async def _incrementar_tipo(tipo_imovel: str, quantidade: int) -> None:
+    """
+    Soma a quantidade ao contador do tipo, criando a entrada se ainda não existir.
+
+    O tipo é sempre comparado como valor (arrayFilters), então pontos, "$" ou
+    texto vazio não viram caminhos de campo. O $push só casa se nenhuma entrada
+    do tipo existir, e se outra requisição a criar antes, o $inc é refeito.
+    Documentos ainda no formato antigo (não lista) são ignorados: a próxima
+    leitura os reconstrói.
+    """
+    if not quantidade:
+        return
+    colecao = Estatisticas.get_motor_collection()
+
+    async def incrementar() -> bool:
+        resultado = await colecao.update_one(
+            {"_id": ID_ESTATISTICAS, "imoveis_por_tipo": {"$elemMatch": {"tipo": tipo_imovel}}},
+            {"$inc": {"imoveis_por_tipo.$[t].quantidade": quantidade}},
+            array_filters=[{"t.tipo": tipo_imovel}],
+        )
+        return bool(resultado.matched_count)
+
+    if await incrementar():
+        return
+    resultado = await colecao.update_one(
+        {
+            "_id": ID_ESTATISTICAS,
+            "imoveis_por_tipo": {"$type": "array"},
+            "imoveis_por_tipo.tipo": {"$ne": tipo_imovel},
+        },
+        {"$push": {"imoveis_por_tipo": {"tipo": tipo_imovel, "quantidade": quantidade}}},
+    )
+    if not resultado.matched_count:
+        await incrementar()
+
+
+async def registrar_imovel(tipo_imovel: str, quantidade: int = 1) -> None:
+    """Soma (ou subtrai, com quantidade negativa) imóveis do tipo informado."""
+    await _incrementar_tipo(tipo_imovel, quantidade)
+
+
+async def registrar_imoveis(por_tipo: dict[str, int]) -> None:
+    """Soma vários tipos de imóvel de uma vez (usado nas criações em lote)."""
+    for tipo, quantidade in por_tipo.items():
+        await _incrementar_tipo(tipo, quantidade)
+
+
+async def registrar_receita(delta: float) -> None:
+    """Ajusta a receita mensal dos contratos ativos."""
+    await _incrementar({"receita_mensal_atual": delta})
+
+
+async def calcular_estatisticas() -> Estatisticas:
+    """Recalcula os contadores a partir das coleções com aggregation pipeline."""
+    pipeline_imoveis = [
+        {"$group": {"_id": "$tipo_imovel", "quantidade": {"$sum": 1}}}
+    ]
+    qtd_por_tipo = await Imovel.aggregate(pipeline_imoveis).to_list()
+
+    pipeline_receita = [
+        {"$match": {"status": "Ativo"}},
+        {"$group": {"_id": None, "receita_total": {"$sum": "$valor_aluguel"}}}
+    ]
+    resultado_receita = await Contrato.aggregate(pipeline_receita).to_list()
+
+    return Estatisticas(
+        imoveis_por_tipo=[
+            ContagemTipo(tipo=item["_id"], quantidade=item["quantidade"])
+            for item in qtd_por_tipo
+        ],
+        receita_mensal_atual=resultado_receita[0]["receita_total"] if resultado_receita else 0.0,
+    )
+
+
+async def reconciliar() -> dict:
+    """
+    Reconstrói o documento de contadores do zero.
+
+    Returns:
+        Diferença entre os valores armazenados e os recalculados.
+    """
+    atual = await _ler_contadores()
+    novo = await calcular_estatisticas()
+    await novo.save()
+
+    if atual is None:
+        return {"documento_existia": False}
+
+    por_tipo_atual, por_tipo_novo = atual.quantidades_por_tipo(), novo.quantidades_por_tipo()
+    tipos = set(por_tipo_atual) | set(por_tipo_novo)
+    divergencia_imoveis = {
+        tipo: por_tipo_novo.get(tipo, 0) - por_tipo_atual.get(tipo, 0)
+        for tipo in tipos
+        if por_tipo_novo.get(tipo, 0) != por_tipo_atual.get(tipo, 0)
+    }
+    return {
+        "documento_existia": True,
+        "divergencia_imoveis_por_tipo": divergencia_imoveis,
+        "divergencia_receita": round(novo.receita_mensal_atual - atual.receita_mensal_atual, 2),
+    }
+
+
+async def _ler_contadores() -> Estatisticas | None:
+    """
+    Lê o documento de contadores, ou None se não existir ou ainda estiver no
+    formato antigo (imoveis_por_tipo como objeto indexado pelo tipo).
+    """
+    documento = await Estatisticas.get_motor_collection().find_one({"_id": ID_ESTATISTICAS})
+    if documento is None or not isinstance(documento.get("imoveis_por_tipo", []), list):
+        return None
+    return Estatisticas.model_validate(documento)
+
+
+async def obter_estatisticas() -> Estatisticas:
+    """Lê os contadores, reconstruindo-os se ainda não existirem."""
+    estatisticas = await _ler_contadores()
+    if estatisticas is None:
+        await reconciliar()
+        estatisticas = await _ler_contadores()
+    return estatisticas
+
+
+async def main():
+    """Executa a reconciliação e imprime o relatório de divergências."""
+    await init_db()
+    relatorio = await reconciliar()
+    print(f"Estatísticas reconciliadas: {relatorio}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,139 @@
+"""
+Reajuste anual em massa do aluguel dos contratos ativos (IGP-M, IPCA...).
+
+Os contratos elegíveis são os ativos com aniversário (mes_aniversario, o mês de
+data_inicio) no mês informado, com pelo menos um ano completo e ainda não
+reajustados no ano. O filtro usa o índice idx_contrato_status_mes_aniversario;
+contratos ativos gravados antes do campo existir são preenchidos antes de cada
+reajuste.
+O novo valor é calculado no próprio MongoDB por um update_many com pipeline,
+sem trazer os contratos para a aplicação, e o mês do reajuste fica gravado em
+ultimo_reajuste: rodar de novo para o mesmo mês não reajusta duas vezes.
+
+A simulação usa o mesmo filtro e a mesma fórmula em um aggregate que devolve
+só os totais.
+
+Uso pela linha de comando:
+    uv run python -m app.services.reajuste --indice IGP-M --percentual 4.5 --ano 2026 --mes 3 [--simular]
+"""
+import argparse
+import asyncio
+from datetime import datetime
+
+from app.core.cache import invalidar
+from app.database.database import init_db
+from app.models.contrato import Contrato
+from app.models.reajuste import ReajusteCreate, ResultadoReajuste
+from app.services import estatisticas
+
+
+def filtro_elegiveis(ano: int, mes: int) -> dict:
+    """Contratos ativos com aniversário no mês, de pelo menos um ano e não reajustados no ano."""
+    fim_mes_ano_anterior = datetime(ano, 1, 1) if mes == 12 else datetime(ano - 1, mes + 1, 1)
+    return {
+        "status": "Ativo",
+        "mes_aniversario": mes,
+        "data_inicio": {"$lt": fim_mes_ano_anterior},
+        "$or": [
+            {"ultimo_reajuste": None},
+            {"ultimo_reajuste": {"$lt": datetime(ano, 1, 1)}},
+        ],
+    }
+
+
+async def preencher_mes_aniversario() -> int:
+    """
+    Grava o mes_aniversario dos contratos ativos que ainda não o têm.
+    A busca usa o mesmo índice do reajuste, então sem pendências custa uma consulta vazia.
+
+    Returns:
+        Quantidade de contratos preenchidos.
+    """
+    resultado = await Contrato.get_motor_collection().update_many(
+        {"status": "Ativo", "mes_aniversario": None},
+        [{"$set": {"mes_aniversario": {"$month": "$data_inicio"}}}],
+    )
+    return resultado.modified_count
+
+
+def novo_valor(percentual: float) -> dict:
+    """Expressão do valor reajustado, arredondado em centavos."""
+    return {"$round": [{"$multiply": ["$valor_aluguel", 1 + percentual / 100]}, 2]}
+
+
+async def simular(dados: ReajusteCreate) -> ResultadoReajuste:
+    """Calcula quantos contratos seriam reajustados e a variação da receita."""
+    await preencher_mes_aniversario()
+    pipeline = [
+        {"$match": filtro_elegiveis(dados.ano, dados.mes)},
+        {"$group": {
+            "_id": None,
+            "contratos": {"$sum": 1},
+            "receita_anterior": {"$sum": "$valor_aluguel"},
+            "receita_nova": {"$sum": novo_valor(dados.percentual)},
+        }},
+    ]
+    totais = await Contrato.get_motor_collection().aggregate(pipeline).to_list(1)
+    totais = totais[0] if totais else {"contratos": 0, "receita_anterior": 0.0, "receita_nova": 0.0}
+    return ResultadoReajuste(
+        indice=dados.indice,
+        percentual=dados.percentual,
+        ano=dados.ano,
+        mes=dados.mes,
+        simulado=True,
+        contratos=totais["contratos"],
+        receita_anterior=round(totais["receita_anterior"], 2),
+        receita_nova=round(totais["receita_nova"], 2),
+        delta_receita=round(totais["receita_nova"] - totais["receita_anterior"], 2),
+    )
+
+
+async def reajustar(dados: ReajusteCreate) -> ResultadoReajuste:
+    """
+    Aplica o reajuste (ou só o simula, com dados.simular) e ajusta a receita do dashboard.
+
+    Returns:
+        Totais do reajuste. Sem simulação, são os previstos imediatamente antes da escrita.
+    """
+    previsto = await simular(dados)
+    if dados.simular or not previsto.contratos:
+        return previsto
+
+    resultado = await Contrato.get_motor_collection().update_many(
+        filtro_elegiveis(dados.ano, dados.mes),
+        [{"$set": {
+            "valor_aluguel": novo_valor(dados.percentual),
+            "ultimo_reajuste": datetime(dados.ano, dados.mes, 1),
+        }}],
+    )
+    if resultado.modified_count == previsto.contratos:
+        await estatisticas.registrar_receita(previsto.delta_receita)
+    else:
+        # Contratos mudaram entre a simulação e a escrita: os totais previstos
+        # não valem mais, então a receita é recalculada do zero
+        await estatisticas.reconciliar()
+    await invalidar("contratos", "estatisticas")
+    return previsto.model_copy(update={"simulado": False, "contratos": resultado.modified_count})
+
+
+def parse_args() -> ReajusteCreate:
+    parser = argparse.ArgumentParser(description="Reajuste anual em massa dos contratos ativos.")
+    parser.add_argument("--indice", required=True, help="Índice aplicado (ex.: IGP-M, IPCA)")
+    parser.add_argument("--percentual", type=float, required=True, help="Variação do índice em %%")
+    parser.add_argument("--ano", type=int, required=True)
+    parser.add_argument("--mes", type=int, required=True, help="Mês de aniversário dos contratos")
+    parser.add_argument("--simular", action="store_true", help="Só mostra os totais, sem alterar nada")
+    args = parser.parse_args()
+    return ReajusteCreate(**vars(args))
+
+
+async def main():
+    """Executa (ou simula) o reajuste e imprime os totais."""
+    dados = parse_args()
+    await init_db()
+    resultado = await reajustar(dados)
+    print(f"Reajuste {'simulado' if resultado.simulado else 'aplicado'}: {resultado.model_dump()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
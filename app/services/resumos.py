@@ -0,0 +1,109 @@
+"""
+Resumos de imóvel e inquilino copiados dentro dos contratos.
+
+A criação do contrato grava os resumos junto com ele. Quando um imóvel ou
+inquilino muda algum dos campos copiados, as rotas de atualização agendam a
+propagação em segundo plano: um único update_many limitado aos contratos
+daquela entidade (pelos índices de imovel.$id e inquilino.$id) e, entre eles,
+só aos que ainda têm o resumo antigo. A reconstrução recalcula todos os
+resumos no servidor, para contratos antigos ou gravados fora das rotas.
+
+Uso pela linha de comando:
+    uv run python -m app.services.resumos
+"""
+import asyncio
+
+from beanie import PydanticObjectId
+
+from app.database.database import init_db
+from app.models.contrato import Contrato, ResumoImovel, ResumoInquilino
+from app.models.imovel import Imovel
+from app.models.inquilino import Inquilino
+
+CAMPOS_IMOVEL = tuple(ResumoImovel.model_fields)
+CAMPOS_INQUILINO = tuple(ResumoInquilino.model_fields)
+
+
+def resumo_imovel(imovel: Imovel) -> ResumoImovel:
+    return ResumoImovel(**{campo: getattr(imovel, campo) for campo in CAMPOS_IMOVEL})
+
+
+def resumo_inquilino(inquilino: Inquilino) -> ResumoInquilino:
+    return ResumoInquilino(**{campo: getattr(inquilino, campo) for campo in CAMPOS_INQUILINO})
+
+
+def mudou(campos: tuple[str, ...], antes, depois) -> bool:
+    """Se algum dos campos copiados para os contratos foi alterado."""
+    return any(getattr(antes, campo) != getattr(depois, campo) for campo in campos)
+
+
+async def _propagar(campo_link: str, campo_resumo: str, id: PydanticObjectId, resumo: dict) -> int:
+    resultado = await Contrato.get_motor_collection().update_many(
+        {f"{campo_link}.$id": id, campo_resumo: {"$ne": resumo}},
+        {"$set": {campo_resumo: resumo}},
+    )
+    return resultado.modified_count
+
+
+async def propagar_imovel(id: PydanticObjectId) -> int:
+    """
+    Atualiza o resumo do imóvel nos contratos dele.
+    Lê o imóvel no momento da propagação, então a última atualização prevalece
+    mesmo que as tarefas de duas atualizações seguidas rodem fora de ordem.
+
+    Returns:
+        Quantidade de contratos alterados.
+    """
+    imovel = await Imovel.get(id)
+    if imovel is None:
+        return 0
+    return await _propagar("imovel", "resumo_imovel", id, resumo_imovel(imovel).model_dump())
+
+
+async def propagar_inquilino(id: PydanticObjectId) -> int:
+    """Atualiza o resumo do inquilino nos contratos dele (ver propagar_imovel)."""
+    inquilino = await Inquilino.get(id)
+    if inquilino is None:
+        return 0
+    return await _propagar(
+        "inquilino", "resumo_inquilino", id, resumo_inquilino(inquilino).model_dump()
+    )
+
+
+def _pipeline_reconstrucao(campo_link: str, colecao: str, campo_resumo: str, campos: tuple[str, ...]) -> list[dict]:
+    """Recalcula um dos resumos de todos os contratos e grava com $merge."""
+    return [
+        {"$lookup": {
+            "from": colecao,
+            "localField": f"{campo_link}.$id",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"_id": 0, **{campo: 1 for campo in campos}}}],
+            "as": "_resumo",
+        }},
+        {"$match": {"_resumo": {"$ne": []}}},
+        {"$project": {campo_resumo: {
+            campo: {"$first": f"$_resumo.{campo}"} for campo in campos
+        }}},
+        {"$merge": {"into": Contrato.Settings.name, "on": "_id", "whenMatched": "merge", "whenNotMatched": "discard"}},
+    ]
+
+
+async def reconstruir() -> None:
+    """Regrava os resumos de todos os contratos a partir de imóveis e inquilinos."""
+    await Contrato.aggregate(
+        _pipeline_reconstrucao("imovel", Imovel.Settings.name, "resumo_imovel", CAMPOS_IMOVEL)
+    ).to_list()
+    await Contrato.aggregate(
+        _pipeline_reconstrucao("inquilino", Inquilino.Settings.name, "resumo_inquilino", CAMPOS_INQUILINO)
+    ).to_list()
+
+
+async def main():
+    """Reconstrói os resumos de todos os contratos."""
+    await init_db()
+    await reconstruir()
+    print("Resumos dos contratos reconstruídos.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
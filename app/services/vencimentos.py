@@ -0,0 +1,141 @@
+"""
+Encerramento automático dos contratos vencidos.
+
+Contratos ativos com data_fim anterior a hoje são encerrados em lotes: cada
+lote é lido pelo índice (status, data_fim), encerrado com um update_many
+condicional (só casa com contratos ainda ativos) e tem os imóveis liberados
+com um único update. Entre os lotes há uma pausa, para não disputar o banco
+com as requisições. Ao final, o resumo da execução é gravado em
+execucoes_vencimento.
+
+A execução roda agendada dentro do processo, se Settings.VENCIMENTO_INTERVALO_MINUTOS
+for ligado (desligado por padrão), pela rota POST /contratos/vencidos/encerrar ou
+pela linha de comando:
+    uv run python -m app.services.vencimentos
+"""
+import asyncio
+import logging
+from datetime import date, datetime, time, timezone
+
+from app.core.cache import invalidar
+from app.core.cache_entidades import cache_entidades
+from app.core.config import settings
+from app.database.database import init_db
+from app.models.contrato import Contrato
+from app.models.imovel import Imovel
+from app.models.vencimento import ExecucaoVencimento
+from app.services import estatisticas
+
+logger = logging.getLogger(__name__)
+
+# Uma execução por processo; a rota manual recusa enquanto outra estiver em andamento
+_em_andamento = asyncio.Lock()
+
+
+def em_andamento() -> bool:
+    return _em_andamento.locked()
+
+
+async def _imoveis_sem_contrato_ativo(ids: list) -> list:
+    """Dos imóveis informados, os que não têm (mais) contrato ativo."""
+    cursor = Contrato.get_motor_collection().find(
+        {"imovel.$id": {"$in": ids}, "status": "Ativo"}, {"imovel": 1}
+    )
+    ocupados = {contrato["imovel"].id async for contrato in cursor}
+    return [id for id in ids if id not in ocupados]
+
+
+async def _encerrar_lote(execucao: ExecucaoVencimento, corte: datetime) -> bool:
+    """
+    Encerra um lote de contratos vencidos.
+
+    Returns:
+        False quando não há mais contratos vencidos.
+    """
+    filtro = {"status": "Ativo", "data_fim": {"$lt": corte}}
+    contratos = await Contrato.get_motor_collection().find(
+        filtro, {"imovel": 1, "valor_aluguel": 1}, sort=[("_id", 1)], limit=settings.VENCIMENTO_LOTE
+    ).to_list(None)
+    if not contratos:
+        return False
+
+    resultado = await Contrato.get_motor_collection().update_many(
+        {**filtro, "_id": {"$in": [c["_id"] for c in contratos]}},
+        {"$set": {"status": "Encerrado"}},
+    )
+    if resultado.modified_count == len(contratos):
+        receita = sum(c["valor_aluguel"] for c in contratos)
+        await estatisticas.registrar_receita(-receita)
+        execucao.receita_descontada += receita
+    else:
+        # Outra escrita (o encerramento individual ou outro worker) encerrou parte
+        # do lote e já descontou a receita desses contratos: recalcula no fim
+        execucao.receita_reconciliada = True
+
+    # Só libera imóveis que não ganharam um novo contrato ativo nesse meio tempo
+    imoveis = await _imoveis_sem_contrato_ativo(list({c["imovel"].id for c in contratos}))
+    if imoveis:
+        await Imovel.get_motor_collection().update_many(
+            {"_id": {"$in": imoveis}}, {"$set": {"status": "Disponivel"}}
+        )
+        await cache_entidades.invalidar(Imovel, *imoveis)
+
+    execucao.lotes += 1
+    execucao.contratos_encerrados += resultado.modified_count
+    execucao.imoveis_liberados += len(imoveis)
+    return len(contratos) == settings.VENCIMENTO_LOTE
+
+
+async def encerrar_vencidos(origem: str = "manual") -> ExecucaoVencimento:
+    """
+    Encerra todos os contratos vencidos e grava o resumo da execução.
+
+    Args:
+        origem: Quem disparou a execução (agendada, manual, linha_de_comando).
+
+    Returns:
+        O resumo gravado (com o erro, se a execução falhou no meio).
+    """
+    async with _em_andamento:
+        execucao = ExecucaoVencimento(
+            origem=origem,
+            inicio=datetime.now(timezone.utc),
+            data_corte=datetime.combine(date.today(), time.min),
+        )
+        try:
+            while await _encerrar_lote(execucao, execucao.data_corte):
+                await asyncio.sleep(settings.VENCIMENTO_PAUSA_MS / 1000)
+        except Exception as e:
+            # O lote interrompido pode ter encerrado contratos sem descontar a receita
+            logger.exception("Encerramento de contratos vencidos interrompido (%s)", origem)
+            execucao.erro = str(e)
+            execucao.receita_reconciliada = True
+        finally:
+            if execucao.receita_reconciliada:
+                await estatisticas.reconciliar()
+            if execucao.contratos_encerrados or execucao.imoveis_liberados:
+                await invalidar("contratos", "imoveis", "estatisticas")
+            execucao.fim = datetime.now(timezone.utc)
+            await execucao.insert()
+        return execucao
+
+
+async def agendar() -> None:
+    """Laço do agendamento no processo: executa já no startup e depois a cada intervalo."""
+    while True:
+        try:
+            await encerrar_vencidos("agendada")
+        except Exception:
+            logger.exception("Falha no encerramento automático de contratos vencidos")
+        await asyncio.sleep(settings.VENCIMENTO_INTERVALO_MINUTOS * 60)
+
+
+async def main():
+    """Executa o encerramento uma vez e imprime o resumo."""
+    await init_db()
+    execucao = await encerrar_vencidos("linha_de_comando")
+    print(f"Encerramento de contratos vencidos: {execucao.model_dump(exclude={'id', 'revision_id'})}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
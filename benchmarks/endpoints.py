@@ -0,0 +1,440 @@
+"""
+Benchmark das rotas da API com verificação de regressão.
+
+Popula um banco separado (DATABASE_NAME + "_bench") com o populate_db.py na
+escala escolhida, chama as rotas do app dentro do próprio processo (ASGI, sem
+servidor HTTP) e mede vazão e latências p50/p95/p99 por rota. O resultado é
+comparado com benchmarks/baseline.json e o processo termina com código 1 se
+alguma rota piorar além do limiar, se alguma requisição falhar ou se não houver
+baseline para a escala.
+
+Com --memoria o MongoDB é substituído por um banco em memória (mongomock-motor,
+do grupo de dependências dev), populado no próprio processo. Ele não implementa
+$lookup com pipeline nem $text, então as rotas que dependem deles ficam de fora,
+e a baseline é guardada à parte (chave "<escala>-memoria").
+
+Uso:
+    uv run python -m benchmarks.endpoints --escala pequena
+    uv run python -m benchmarks.endpoints --escala pequena --memoria
+    uv run python -m benchmarks.endpoints --escala media --atualizar-baseline
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+from pymongo import UpdateOne
+
+import populate_db
+from app.core.config import settings
+from app.database import database
+from app.database.database import init_db
+from app.main import app
+from app.models.contrato import Contrato
+from app.models.imovel import Imovel
+from app.models.inquilino import Inquilino
+from app.models.proprietario import Proprietario
+from app.services import resumos
+
+RAIZ = Path(__file__).resolve().parent.parent
+ARQUIVO_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# Quantidades passadas ao populate_db.py em cada escala. Metade dos contratos
+# são ativos (um por imóvel), então sobra metade dos imóveis disponível para
+# medir POST /contratos/
+ESCALAS = {
+    "pequena": {"proprietarios": 100, "imoveis": 1_000, "inquilinos": 800, "contratos": 1_000},
+    "media": {"proprietarios": 1_000, "imoveis": 10_000, "inquilinos": 8_000, "contratos": 10_000},
+    "grande": {"proprietarios": 10_000, "imoveis": 100_000, "inquilinos": 80_000, "contratos": 100_000},
+}
+
+
+@dataclass
+class Cenario:
+    """Uma rota a ser medida; caminho e corpo podem depender dos ids de exemplo."""
+    nome: str
+    metodo: str
+    caminho: Callable[[dict, int], str]
+    corpo: Callable[[dict, int], Any] | None = None
+    fracao: float = 1.0  # fração do número de requisições usada por esta rota
+    somente_mongodb: bool = False  # usa recursos que o banco em memória não implementa
+
+
+@dataclass
+class Resultado:
+    nome: str
+    requisicoes: int
+    erros: int
+    rps: float
+    p50: float
+    p95: float
+    p99: float
+    latencias: list[float] = field(default_factory=list, repr=False)
+
+    def resumo(self) -> dict:
+        return {
+            "requisicoes": self.requisicoes,
+            "erros": self.erros,
+            "rps": round(self.rps, 1),
+            "p50_ms": round(self.p50, 2),
+            "p95_ms": round(self.p95, 2),
+            "p99_ms": round(self.p99, 2),
+        }
+
+
+async def chamar(app, metodo: str, caminho: str, corpo: Any = None) -> int:
+    """
+    Executa uma requisição diretamente no app ASGI e devolve o status HTTP.
+    O corpo da resposta é consumido por inteiro, como faria um cliente real.
+    """
+    path, _, query = caminho.partition("?")
+    dados = json.dumps(corpo).encode() if corpo is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": metodo,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [
+            (b"host", b"bench"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(dados)).encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    corpo_enviado = False
+    concluido = asyncio.Event()
+    status = 0
+
+    async def receive():
+        nonlocal corpo_enviado
+        if not corpo_enviado:
+            corpo_enviado = True
+            return {"type": "http.request", "body": dados, "more_body": False}
+        # Só informa a desconexão depois que a resposta terminou (respostas em streaming)
+        await concluido.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(mensagem):
+        nonlocal status
+        if mensagem["type"] == "http.response.start":
+            status = mensagem["status"]
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        # O ServerErrorMiddleware já respondeu 500 e repassa a exceção
+        return 500
+    finally:
+        concluido.set()
+    return status
+
+
+def cenarios(hoje: date) -> list[Cenario]:
+    """Rotas medidas; os ids vêm de documentos reais do banco de benchmark."""
+    return [
+        Cenario("GET /proprietarios/", "GET", lambda ids, i: "/proprietarios/?limit=50"),
+        Cenario("GET /imoveis/", "GET", lambda ids, i: "/imoveis/?limit=50"),
+        Cenario("GET /inquilinos/", "GET", lambda ids, i: "/inquilinos/?limit=50"),
+        Cenario("GET /contratos/", "GET", lambda ids, i: "/contratos/?limit=50"),
+        Cenario("GET /contratos/?status", "GET", lambda ids, i: "/contratos/?status=Ativo&limit=50"),
+        Cenario("GET /contratos/?skip profundo", "GET", lambda ids, i: "/contratos/?skip=1000&limit=50"),
+        Cenario("GET /proprietarios/{id}", "GET", lambda ids, i: f"/proprietarios/{ids['proprietario']}"),
+        Cenario("GET /imoveis/{id}", "GET", lambda ids, i: f"/imoveis/{ids['imovel']}"),
+        Cenario("GET /inquilinos/{id}", "GET", lambda ids, i: f"/inquilinos/{ids['inquilino']}"),
+        Cenario("GET /contratos/{id}", "GET", lambda ids, i: f"/contratos/{ids['contrato']}"),
+        Cenario("GET /imoveis/proprietario/{id}", "GET", lambda ids, i: f"/imoveis/proprietario/{ids['proprietario']}"),
+        Cenario("GET /contratos/imovel/{id}", "GET", lambda ids, i: f"/contratos/imovel/{ids['imovel']}"),
+        Cenario("GET /contratos/inquilino/{id}", "GET", lambda ids, i: f"/contratos/inquilino/{ids['inquilino']}"),
+        Cenario("GET /imoveis/buscar", "GET", lambda ids, i: "/imoveis/buscar?tipo=Casa&status=Disponivel"),
+        Cenario("GET /inquilinos/buscar", "GET", lambda ids, i: f"/inquilinos/buscar?cpf={ids['cpf']}"),
+        Cenario("GET /dashboard/estatisticas", "GET", lambda ids, i: "/dashboard/estatisticas"),
+        Cenario(
+            "GET /dashboard/completo", "GET", lambda ids, i: "/dashboard/completo",
+            fracao=0.05, somente_mongodb=True,
+        ),
+        Cenario(
+            "GET /dashboard/completo?ndjson", "GET", lambda ids, i: "/dashboard/completo?formato=ndjson",
+            fracao=0.05, somente_mongodb=True,
+        ),
+        Cenario(
+            "GET /consultas/contratos-por-vencimento",
+            "GET",
+            lambda ids, i: f"/consultas/contratos-por-vencimento?ano={hoje.year}&mes={hoje.month}",
+            somente_mongodb=True,
+        ),
+        Cenario(
+            "GET /consultas/contratos-por-vencimento?dias",
+            "GET",
+            lambda ids, i: "/consultas/contratos-por-vencimento?dias=90&status=Ativo",
+            somente_mongodb=True,
+        ),
+        Cenario(
+            "GET /consultas/imoveis-busca-texto", "GET", lambda ids, i: "/consultas/imoveis-busca-texto?termo=casa",
+            somente_mongodb=True,
+        ),
+        Cenario(
+            "POST /contratos/",
+            "POST",
+            lambda ids, i: "/contratos/",
+            corpo=lambda ids, i: {
+                "id_inquilino": ids["inquilino"],
+                "id_imovel": ids["imoveis_disponiveis"][i],
+                "data_inicio": hoje.isoformat(),
+                "data_fim": (hoje + timedelta(days=365)).isoformat(),
+                "valor_aluguel": 1500.0,
+            },
+            fracao=0.5,
+        ),
+    ]
+
+
+async def medir(
+    app, cenario: Cenario, ids: dict, requisicoes: int, concorrencia: int, deslocamento: int = 0
+) -> Resultado:
+    """
+    Dispara as requisições de um cenário com concorrência limitada e mede cada uma.
+    O deslocamento soma-se ao índice de cada requisição, para que rodadas seguintes
+    de POST /contratos/ usem outros imóveis disponíveis.
+    """
+    semaforo = asyncio.Semaphore(concorrencia)
+    latencias: list[float] = []
+    erros = 0
+
+    async def uma(i: int):
+        nonlocal erros
+        caminho = cenario.caminho(ids, deslocamento + i)
+        corpo = cenario.corpo(ids, deslocamento + i) if cenario.corpo else None
+        async with semaforo:
+            inicio = time.perf_counter()
+            status = await chamar(app, cenario.metodo, caminho, corpo)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        if status >= 400:
+            erros += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(uma(i) for i in range(requisicoes)))
+    duracao = time.perf_counter() - inicio
+
+    percentis = statistics.quantiles(latencias, n=100, method="inclusive") if len(latencias) > 1 else latencias * 99
+    return Resultado(
+        nome=cenario.nome,
+        requisicoes=requisicoes,
+        erros=erros,
+        rps=requisicoes / duracao,
+        p50=percentis[49],
+        p95=percentis[94],
+        p99=percentis[98],
+        latencias=latencias,
+    )
+
+
+def argumentos_populate(escala: str, seed: int) -> list[str]:
+    """Argumentos de linha de comando do populate_db.py para a escala."""
+    argumentos = ["--limpar", "--seed", str(seed)]
+    for colecao, quantidade in ESCALAS[escala].items():
+        argumentos += [f"--{colecao}", str(quantidade)]
+    return argumentos
+
+
+def popular(escala: str, seed: int) -> None:
+    """Recria o banco de benchmark rodando o populate_db.py em um subprocesso."""
+    comando = [sys.executable, str(RAIZ / "populate_db.py"), *argumentos_populate(escala, seed)]
+    env = {**os.environ, "DATABASE_NAME": settings.DATABASE_NAME}
+    subprocess.run(comando, cwd=RAIZ, env=env, check=True)
+
+
+def usar_banco_em_memoria() -> None:
+    """
+    Faz o init_db usar um client do mongomock-motor no lugar do servidor MongoDB.
+    O banco só existe neste processo, então é populado aqui mesmo (ver main).
+    """
+    from mongomock_motor import AsyncMongoMockClient
+
+    client = AsyncMongoMockClient()
+    database.criar_cliente = lambda: client
+
+
+async def preencher_resumos() -> None:
+    """
+    Grava os resumos de imóvel e inquilino nos contratos calculando-os aqui, já que
+    o banco em memória não roda o pipeline do resumos.reconstruir().
+    """
+    imoveis = {i.id: resumos.resumo_imovel(i).model_dump() for i in await Imovel.find_all().to_list()}
+    inquilinos = {
+        i.id: resumos.resumo_inquilino(i).model_dump() for i in await Inquilino.find_all().to_list()
+    }
+    colecao = Contrato.get_motor_collection()
+    operacoes = [
+        UpdateOne({"_id": contrato["_id"]}, {"$set": {
+            "resumo_imovel": imoveis[contrato["imovel"].id],
+            "resumo_inquilino": inquilinos[contrato["inquilino"].id],
+        }})
+        async for contrato in colecao.find({}, {"imovel": 1, "inquilino": 1})
+    ]
+    if operacoes:
+        await colecao.bulk_write(operacoes, ordered=False)
+
+
+async def iniciar_banco_em_memoria(escala: str, seed: int) -> None:
+    """Inicializa o app sobre o banco em memória e o popula na escala escolhida."""
+    usar_banco_em_memoria()
+    await init_db()
+    await populate_db.popular(populate_db.parse_args(argumentos_populate(escala, seed)), resumos=False)
+    await preencher_resumos()
+
+
+async def medir_rodadas(
+    app, cenario: Cenario, ids: dict, requisicoes: int, concorrencia: int, rodadas: int
+) -> Resultado:
+    """
+    Mede o cenário várias vezes e fica com a rodada de menor p95, o que filtra
+    o ruído da máquina; os erros de todas as rodadas são somados.
+    """
+    medicoes = [
+        await medir(app, cenario, ids, requisicoes, concorrencia, rodada * requisicoes)
+        for rodada in range(rodadas)
+    ]
+    melhor = min(medicoes, key=lambda medicao: medicao.p95)
+    melhor.erros = sum(medicao.erros for medicao in medicoes)
+    return melhor
+
+
+def requisicoes_cenario(cenario: Cenario, args: argparse.Namespace) -> int:
+    return max(5, int(args.requisicoes * cenario.fracao))
+
+
+async def coletar_ids(requisicoes: int) -> dict:
+    """Busca ids de exemplo usados pelos cenários (e imóveis livres para criar contratos)."""
+    imovel = await Imovel.find_one({"status": "Alugado"})
+    inquilino = await Inquilino.find_one()
+    disponiveis = await Imovel.find({"status": "Disponivel"}).limit(requisicoes).to_list()
+    if len(disponiveis) < requisicoes:
+        raise SystemExit(
+            f"São necessários {requisicoes} imóveis disponíveis para medir POST /contratos/; "
+            "use uma escala maior ou menos --requisicoes/--rodadas"
+        )
+    return {
+        "proprietario": str((await Proprietario.find_one()).id),
+        "imovel": str(imovel.id),
+        "inquilino": str(inquilino.id),
+        "cpf": inquilino.cpf,
+        "contrato": str((await Contrato.find_one()).id),
+        "imoveis_disponiveis": [str(i.id) for i in disponiveis],
+    }
+
+
+def comparar(resultados: list[Resultado], baseline: dict, limiar: float) -> list[str]:
+    """Lista as regressões de p95 ou vazão acima do limiar em relação à baseline."""
+    regressoes = []
+    for resultado in resultados:
+        base = baseline.get(resultado.nome)
+        if not base:
+            continue
+        if resultado.p95 > base["p95_ms"] * (1 + limiar):
+            regressoes.append(
+                f"{resultado.nome}: p95 {resultado.p95:.2f}ms > baseline {base['p95_ms']:.2f}ms"
+            )
+        if resultado.rps < base["rps"] * (1 - limiar):
+            regressoes.append(
+                f"{resultado.nome}: vazão {resultado.rps:.1f} req/s < baseline {base['rps']:.1f} req/s"
+            )
+    return regressoes
+
+
+def imprimir(resultados: list[Resultado]) -> None:
+    print(f"{'rota':<48}{'req':>6}{'erros':>7}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for r in resultados:
+        print(f"{r.nome:<48}{r.requisicoes:>6}{r.erros:>7}{r.rps:>10.1f}{r.p50:>10.2f}{r.p95:>10.2f}{r.p99:>10.2f}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark das rotas da API.")
+    parser.add_argument("--escala", choices=ESCALAS, default="pequena")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requisicoes", type=int, default=200, help="Requisições por rota")
+    parser.add_argument("--concorrencia", type=int, default=10, help="Requisições simultâneas")
+    parser.add_argument("--rodadas", type=int, default=3, help="Medições por rota (vale a de menor p95)")
+    parser.add_argument("--limiar", type=float, default=0.2, help="Piora tolerada (0.2 = 20%%)")
+    parser.add_argument("--sem-popular", action="store_true", help="Reusa o banco de benchmark existente")
+    parser.add_argument("--com-cache", action="store_true", help="Mede com os caches de respostas e de entidades ligados")
+    parser.add_argument("--atualizar-baseline", action="store_true", help="Grava os resultados como nova baseline")
+    parser.add_argument(
+        "--memoria", action="store_true",
+        help="Usa um MongoDB em memória (mongomock-motor) no lugar do servidor",
+    )
+    return parser.parse_args()
+
+
+async def main() -> int:
+    args = parse_args()
+
+    # Banco separado para não misturar com os dados de desenvolvimento.
+    # Todos os módulos compartilham o mesmo objeto settings, então basta ajustá-lo
+    # antes do init_db; o populate_db.py recebe o mesmo nome por variável de ambiente.
+    settings.DATABASE_NAME = f"{settings.DATABASE_NAME}_bench"
+    if not args.com_cache:
+        settings.CACHE_BACKEND = "desligado"
+        settings.CACHE_ENTIDADES_MAX_ITENS = 0
+
+    if args.memoria:
+        await iniciar_banco_em_memoria(args.escala, args.seed)
+    else:
+        if not args.sem_popular:
+            popular(args.escala, args.seed)
+        await init_db()
+    lista_cenarios = cenarios(date.today())
+    # Cada requisição de POST /contratos/, em todas as rodadas, aluga um imóvel diferente
+    escritas = max(requisicoes_cenario(c, args) for c in lista_cenarios if c.corpo)
+    ids = await coletar_ids(escritas * args.rodadas)
+
+    resultados = []
+    for cenario in lista_cenarios:
+        if args.memoria and cenario.somente_mongodb:
+            print(f"Ignorado no banco em memória: {cenario.nome}")
+            continue
+        resultados.append(await medir_rodadas(
+            app, cenario, ids, requisicoes_cenario(cenario, args), args.concorrencia, args.rodadas
+        ))
+    imprimir(resultados)
+
+    com_erros = [r for r in resultados if r.erros]
+    for resultado in com_erros:
+        print(f"ERROS {resultado.nome}: {resultado.erros} de {resultado.requisicoes} requisições falharam")
+
+    chave = f"{args.escala}-memoria" if args.memoria else args.escala
+    baselines = json.loads(ARQUIVO_BASELINE.read_text()) if ARQUIVO_BASELINE.exists() else {}
+    if args.atualizar_baseline:
+        if com_erros:
+            print("Baseline não gravada: há rotas com requisições com erro.")
+            return 1
+        baselines[chave] = {r.nome: r.resumo() for r in resultados}
+        ARQUIVO_BASELINE.write_text(json.dumps(baselines, indent=2, ensure_ascii=False) + "\n")
+        print(f"Baseline '{chave}' gravada em {ARQUIVO_BASELINE}")
+        return 0
+
+    baseline = baselines.get(chave, {})
+    if not baseline:
+        print(f"Sem baseline '{chave}'; rode com --atualizar-baseline para criar.")
+        return 1
+
+    regressoes = comparar(resultados, baseline, args.limiar)
+    for regressao in regressoes:
+        print(f"REGRESSÃO {regressao}")
+    return 1 if regressoes or com_erros else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
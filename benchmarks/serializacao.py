@@ -0,0 +1,88 @@
+"""
+Benchmark da serialização rápida das listagens (Settings.SERIALIZACAO_RAPIDA).
+
+Lê documentos crus do banco de benchmark uma única vez e mede, só na CPU, os
+dois caminhos de serialização de uma página de listagem:
+- normal: Document do Beanie + validação e dump_json do response_model (FastAPI);
+- rápido: conversor pré-compilado + pydantic_core.to_json (app/core/serializacao.py).
+
+Também confere que os dois geram exatamente os mesmos bytes.
+
+Uso (depois de popular o banco com benchmarks.endpoints, ou com --memoria, que
+popula o banco em memória do benchmarks.endpoints no próprio processo):
+    uv run python -m benchmarks.serializacao --pagina 100 --repeticoes 200
+    uv run python -m benchmarks.serializacao --memoria
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from benchmarks.endpoints import ESCALAS, iniciar_banco_em_memoria
+from app.core.serializacao import serializador
+from app.database.database import init_db
+from app.models.contrato import Contrato
+from app.models.imovel import Imovel
+from app.models.inquilino import Inquilino
+from app.models.proprietario import Proprietario
+
+MODELS = [Proprietario, Imovel, Inquilino, Contrato]
+
+
+def caminho_normal(model, adapter: TypeAdapter, documentos: list[dict]) -> bytes:
+    """Equivalente ao que a rota faz hoje: Document do Beanie e response_model."""
+    objetos = [model.model_validate(documento) for documento in documentos]
+    return adapter.dump_json(adapter.validate_python(objetos), by_alias=True)
+
+
+def caminho_rapido(model, adapter: TypeAdapter, documentos: list[dict]) -> bytes:
+    return serializador(model).json(documentos)
+
+
+def medir(funcao, model, adapter, documentos, repeticoes: int) -> float:
+    """Documentos serializados por segundo."""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao(model, adapter, documentos)
+    return len(documentos) * repeticoes / (time.perf_counter() - inicio)
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark da serialização das listagens.")
+    parser.add_argument("--pagina", type=int, default=100, help="Documentos por página")
+    parser.add_argument("--repeticoes", type=int, default=200)
+    parser.add_argument("--memoria", action="store_true", help="Usa o banco em memória do benchmarks.endpoints")
+    parser.add_argument("--escala", choices=ESCALAS, default="pequena", help="Escala do banco em memória")
+    args = parser.parse_args()
+
+    settings.DATABASE_NAME = f"{settings.DATABASE_NAME}_bench"
+    if args.memoria:
+        await iniciar_banco_em_memoria(args.escala, seed=42)
+    else:
+        await init_db()
+
+    divergencias = 0
+    print(f"{'model':<16}{'normal doc/s':>16}{'rápido doc/s':>16}{'ganho':>9}")
+    for model in MODELS:
+        documentos = await model.get_motor_collection().find().limit(args.pagina).to_list(None)
+        if not documentos:
+            print(f"{model.__name__:<16}sem documentos; rode benchmarks.endpoints antes")
+            continue
+        adapter = TypeAdapter(list[model])
+
+        if caminho_normal(model, adapter, documentos) != caminho_rapido(model, adapter, documentos):
+            print(f"{model.__name__}: JSON diferente entre os caminhos!")
+            divergencias += 1
+            continue
+
+        normal = medir(caminho_normal, model, adapter, documentos, args.repeticoes)
+        rapido = medir(caminho_rapido, model, adapter, documentos, args.repeticoes)
+        print(f"{model.__name__:<16}{normal:>16.0f}{rapido:>16.0f}{rapido / normal:>8.1f}x")
+    return 1 if divergencias else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,22 +1,38 @@
 """
 Script para popular o banco de dados MongoDB com dados realistas.
 Utiliza a biblioteca Faker para gerar dados brasileiros.
+
+Os dados são gerados em lotes por um pool de processos e gravados com
+insert_many, vários lotes em paralelo, o que permite carregar milhões de
+documentos para reproduzir o volume de produção.
+
+Uso:
+    uv run python populate_db.py
+    uv run python populate_db.py --proprietarios 50000 --imoveis 500000 \\
+        --inquilinos 400000 --contratos 2000000 --seed 42 --limpar
 """
+import argparse
 import asyncio
+import hashlib
+import os
 import random
-from datetime import date, timedelta
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from bson import DBRef, ObjectId
 from faker import Faker
+from pymongo.errors import BulkWriteError
 from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
 
 from app.core.config import settings
+from app.database.database import criar_cliente
 from app.models.proprietario import Proprietario
 from app.models.imovel import Imovel
 from app.models.inquilino import Inquilino
 from app.models.contrato import Contrato
-
-# Configurar Faker para dados em português brasileiro
-fake = Faker('pt_BR')
+from app.models.estatisticas import Estatisticas
+from app.services.estatisticas import reconciliar
+from app.services.resumos import reconstruir as reconstruir_resumos
 
 # Tipos de imóveis disponíveis
 TIPOS_IMOVEL = ["Casa", "Apartamento", "Kitnet", "Sala Comercial", "Galpão"]
@@ -30,13 +46,209 @@ APELIDOS_IMOVEL = [
     "Galpão Industrial"
 ]
 
+# Faixa de valor de aluguel por tipo de imóvel
+VALORES_BASE = {
+    "Casa": (1500, 5000),
+    "Apartamento": (1200, 4000),
+    "Kitnet": (600, 1200),
+    "Sala Comercial": (800, 3000),
+    "Galpão": (2000, 8000)
+}
+
+# Byte que identifica a coleção dentro do ObjectId gerado
+CODIGO_COLECAO = {"proprietarios": 1, "imoveis": 2, "inquilinos": 3, "contratos": 4}
+
+# Instância de Faker de cada processo do pool (criada uma vez por processo)
+_fake: Faker | None = None
+
+
+def _faker(seed: int) -> Faker:
+    """Devolve o Faker do processo, já semeado para o lote atual."""
+    global _fake
+    if _fake is None:
+        _fake = Faker('pt_BR')
+    _fake.seed_instance(seed)
+    return _fake
+
+
+def _semente(seed: int, colecao: str, indice: int) -> int:
+    """Semente determinística de um lote ou item, derivada da semente global."""
+    # hash() de str muda a cada processo, por isso um digest estável
+    digest = hashlib.blake2b(f"{seed}:{colecao}:{indice}".encode(), digest_size=4).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _prefixo(seed: int) -> bytes:
+    """
+    Prefixo de 7 bytes dos ObjectIds da execução, derivado da semente: a mesma
+    --seed gera sempre os mesmos _id (e CPFs).
+    """
+    return hashlib.blake2b(f"{seed}:prefixo".encode(), digest_size=7).digest()
+
+
+def _object_id(prefixo: bytes, colecao: str, indice: int) -> ObjectId:
+    """
+    Gera o _id do documento a partir do seu índice.
+    Assim qualquer processo calcula o _id referenciado sem trocar listas de ids.
+    """
+    return ObjectId(prefixo + bytes([CODIGO_COLECAO[colecao]]) + indice.to_bytes(4, "big"))
+
+
+def _para_datetime(dia: date) -> datetime:
+    """O MongoDB não tem tipo date; o Beanie grava datas como datetime à meia-noite."""
+    return datetime.combine(dia, datetime.min.time())
+
+
+def _tipo_e_valor(seed: int, indice: int) -> tuple[str, float]:
+    """Tipo e valor base do imóvel, recalculáveis por quem gera os contratos."""
+    rng = random.Random(_semente(seed, "imoveis-valor", indice))
+    tipo = rng.choice(TIPOS_IMOVEL)
+    valor_min, valor_max = VALORES_BASE.get(tipo, (1000, 3000))
+    return tipo, round(rng.uniform(valor_min, valor_max), 2)
+
+
+def _cpf(base: int) -> str:
+    """Monta um CPF válido (com dígitos verificadores) a partir de 9 dígitos."""
+    digitos = [int(d) for d in f"{base % 10**9:09d}"]
+    for tamanho in (9, 10):
+        soma = sum(d * peso for d, peso in zip(digitos, range(tamanho + 1, 1, -1)))
+        resto = soma * 10 % 11
+        digitos.append(0 if resto == 10 else resto)
+    return "".join(map(str, digitos))
+
+
+def gerar_proprietarios(seed: int, prefixo: bytes, inicio: int, fim: int) -> list[dict]:
+    """
+    Gera um lote de proprietários (executado no pool de processos).
+
+    Args:
+        seed: Semente global da execução.
+        prefixo: Prefixo dos ObjectIds desta execução.
+        inicio: Índice do primeiro proprietário do lote.
+        fim: Índice seguinte ao último proprietário do lote.
+
+    Returns:
+        Documentos prontos para o insert_many.
+    """
+    fake = _faker(_semente(seed, "proprietarios", inicio))
+    return [
+        {
+            "_id": _object_id(prefixo, "proprietarios", i),
+            "nome": fake.name(),
+            "cpf": fake.cpf(),
+            "email": fake.email(),
+            "telefone": fake.cellphone_number(),
+            "endereco": fake.address(),
+        }
+        for i in range(inicio, fim)
+    ]
+
+
+def gerar_imoveis(
+    seed: int, prefixo: bytes, inicio: int, fim: int,
+    total_proprietarios: int, total_alugados: int
+) -> list[dict]:
+    """
+    Gera um lote de imóveis associados a proprietários existentes.
+
+    Os primeiros total_alugados imóveis já nascem "Alugado": são eles que
+    recebem os contratos ativos, mantendo um único contrato ativo por imóvel.
+    """
+    fake = _faker(_semente(seed, "imoveis", inicio))
+    rng = random.Random(_semente(seed, "imoveis", inicio))
+    imoveis = []
+    for i in range(inicio, fim):
+        tipo, valor = _tipo_e_valor(seed, i)
+        imoveis.append({
+            "_id": _object_id(prefixo, "imoveis", i),
+            "apelido_imovel": f"{rng.choice(APELIDOS_IMOVEL)} {i + 1}",
+            "descricao": f"{tipo} com {rng.randint(1, 4)} quartos, {rng.randint(1, 3)} banheiros. {fake.sentence()}",
+            "endereco": fake.address(),
+            "valor_aluguel_base": valor,
+            "tipo_imovel": tipo,
+            "status": "Alugado" if i < total_alugados else "Disponivel",
+            "proprietario": DBRef(
+                "proprietarios",
+                _object_id(prefixo, "proprietarios", rng.randrange(total_proprietarios))
+            ),
+        })
+    return imoveis
+
+
+def gerar_inquilinos(seed: int, prefixo: bytes, inicio: int, fim: int) -> list[dict]:
+    """
+    Gera um lote de inquilinos; o CPF é derivado do prefixo da execução e do
+    índice, como o _id, para respeitar o índice único.
+    """
+    fake = _faker(_semente(seed, "inquilinos", inicio))
+    rng = random.Random(_semente(seed, "inquilinos", inicio))
+    base_cpf = int.from_bytes(prefixo, "big") % 10**9
+    return [
+        {
+            "_id": _object_id(prefixo, "inquilinos", i),
+            "nome": fake.name(),
+            "cpf": _cpf(base_cpf + i),
+            "email": fake.email(),
+            "telefone": fake.cellphone_number(),
+            "renda_mensal": round(rng.uniform(2000, 15000), 2),
+        }
+        for i in range(inicio, fim)
+    ]
+
+
+def gerar_contratos(
+    seed: int, prefixo: bytes, inicio: int, fim: int,
+    total_imoveis: int, total_inquilinos: int, total_ativos: int
+) -> list[dict]:
+    """
+    Gera um lote de contratos de aluguel entre inquilinos e imóveis.
+
+    Regras:
+    - O contrato de índice i < total_ativos é ativo e usa o imóvel i (um ativo por imóvel)
+    - Os demais são encerrados ou cancelados, com datas no passado
+    """
+    rng = random.Random(_semente(seed, "contratos", inicio))
+    hoje = date.today()
+    contratos = []
+    for i in range(inicio, fim):
+        if i < total_ativos:
+            indice_imovel = i
+            # Contrato ativo - começou há alguns meses, termina no futuro
+            data_inicio = hoje - timedelta(days=rng.randint(30, 180))
+            data_fim = data_inicio + timedelta(days=rng.randint(365, 730))
+            fator = rng.uniform(0.95, 1.1)
+            status = "Ativo"
+        else:
+            indice_imovel = rng.randrange(total_imoveis)
+            # Contrato encerrado - no passado
+            data_fim = hoje - timedelta(days=rng.randint(30, 365))
+            data_inicio = data_fim - timedelta(days=rng.randint(180, 730))
+            fator = rng.uniform(0.9, 1.05)
+            status = rng.choice(["Encerrado", "Cancelado"])
+
+        _, valor_base = _tipo_e_valor(seed, indice_imovel)
+        contratos.append({
+            "_id": _object_id(prefixo, "contratos", i),
+            "inquilino": DBRef(
+                "inquilinos",
+                _object_id(prefixo, "inquilinos", rng.randrange(total_inquilinos))
+            ),
+            "imovel": DBRef("imoveis", _object_id(prefixo, "imoveis", indice_imovel)),
+            "data_inicio": _para_datetime(data_inicio),
+            "mes_aniversario": data_inicio.month,
+            "data_fim": _para_datetime(data_fim),
+            "valor_aluguel": valor_base * fator,
+            "status": status,
+        })
+    return contratos
+
 
 async def init_database():
     """Inicializa a conexão com o banco de dados."""
-    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    client = criar_cliente()
     await init_beanie(
         database=client[settings.DATABASE_NAME],
-        document_models=[Proprietario, Imovel, Inquilino, Contrato],
+        document_models=[Proprietario, Imovel, Inquilino, Contrato, Estatisticas],
     )
     print("Conexão com MongoDB estabelecida!")
 
@@ -50,209 +262,135 @@ async def limpar_banco():
     print("Banco de dados limpo!")
 
 
-async def criar_proprietarios(quantidade: int = 12) -> list[Proprietario]:
+async def popular_colecao(
+    model, gerador, quantidade: int, args, pool: ProcessPoolExecutor, *extras
+) -> int:
     """
-    Cria proprietários com dados realistas brasileiros.
-    
-    Args:
-        quantidade: Número de proprietários a criar.
-    
-    Returns:
-        Lista de proprietários criados.
-    """
-    proprietarios = []
-    
-    for _ in range(quantidade):
-        prop = Proprietario(
-            nome=fake.name(),
-            cpf=fake.cpf(),
-            email=fake.email(),
-            telefone=fake.cellphone_number(),
-            endereco=fake.address()
-        )
-        await prop.insert()
-        proprietarios.append(prop)
-    
-    print(f"👤 {quantidade} proprietários criados!")
-    return proprietarios
+    Gera e grava uma coleção em lotes.
 
+    Cada lote é gerado no pool de processos e gravado com um insert_many não
+    ordenado; no máximo args.concorrencia lotes ficam em andamento ao mesmo tempo,
+    o que limita a memória usada.
 
-async def criar_imoveis(proprietarios: list[Proprietario], quantidade: int = 15) -> list[Imovel]:
-    """
-    Cria imóveis associados a proprietários existentes.
-    
-    Args:
-        proprietarios: Lista de proprietários disponíveis.
-        quantidade: Número de imóveis a criar.
-    
     Returns:
-        Lista de imóveis criados.
+        Quantidade de documentos inseridos.
+
+    Raises:
+        SystemExit: Se algum documento não for gravado (por exemplo, _id ou CPF já
+            existentes ao repetir a mesma --seed sem --limpar), para não gerar
+            contratos apontando para documentos que não existem.
     """
-    imoveis = []
-    apelidos_usados = set()
-    
-    for i in range(quantidade):
-        # Gerar apelido único
-        apelido_base = random.choice(APELIDOS_IMOVEL)
-        apelido = f"{apelido_base} {i+1}" if apelido_base in apelidos_usados else apelido_base
-        apelidos_usados.add(apelido)
-        
-        tipo = random.choice(TIPOS_IMOVEL)
-        
-        # Valor baseado no tipo de imóvel
-        valores_base = {
-            "Casa": (1500, 5000),
-            "Apartamento": (1200, 4000),
-            "Kitnet": (600, 1200),
-            "Sala Comercial": (800, 3000),
-            "Galpão": (2000, 8000)
-        }
-        valor_min, valor_max = valores_base.get(tipo, (1000, 3000))
-        
-        imovel = Imovel(
-            apelido_imovel=apelido,
-            descricao=f"{tipo} com {random.randint(1, 4)} quartos, {random.randint(1, 3)} banheiros. {fake.sentence()}",
-            endereco=fake.address(),
-            valor_aluguel_base=round(random.uniform(valor_min, valor_max), 2),
-            tipo_imovel=tipo,
-            status="Disponivel",
-            proprietario=random.choice(proprietarios)
-        )
-        await imovel.insert()
-        imoveis.append(imovel)
-    
-    print(f"{quantidade} imóveis criados!")
-    return imoveis
+    loop = asyncio.get_running_loop()
+    semaforo = asyncio.Semaphore(args.concorrencia)
+    colecao = model.get_motor_collection()
+
+    async def processar_lote(inicio: int) -> int:
+        async with semaforo:
+            fim = min(inicio + args.lote, quantidade)
+            documentos = await loop.run_in_executor(
+                pool, gerador, args.seed, args.prefixo, inicio, fim, *extras
+            )
+            try:
+                resultado = await colecao.insert_many(documentos, ordered=False)
+            except BulkWriteError as e:
+                erros = e.details.get("writeErrors", [])
+                raise SystemExit(
+                    f"Falha ao gravar {len(erros)} documento(s) em '{colecao.name}' "
+                    f"({erros[0].get('errmsg') if erros else e}). "
+                    "Use --limpar ou outra --seed para não repetir os dados já gravados."
+                )
+            return len(resultado.inserted_ids)
 
+    inseridos = await asyncio.gather(
+        *(processar_lote(inicio) for inicio in range(0, quantidade, args.lote))
+    )
+    return sum(inseridos)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Popula o banco com dados sintéticos.")
+    parser.add_argument("--proprietarios", type=int, default=12)
+    parser.add_argument("--imoveis", type=int, default=15)
+    parser.add_argument("--inquilinos", type=int, default=15)
+    parser.add_argument("--contratos", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=42, help="Semente para gerar sempre os mesmos dados (com o mesmo --lote)")
+    parser.add_argument("--lote", type=int, default=5000, help="Documentos por insert_many")
+    parser.add_argument("--concorrencia", type=int, default=4, help="Lotes gravados em paralelo")
+    parser.add_argument("--processos", type=int, default=os.cpu_count(), help="Processos gerando dados")
+    parser.add_argument("--limpar", action="store_true", help="Apaga os dados existentes antes de popular")
+    args = parser.parse_args(argv)
 
-async def criar_inquilinos(quantidade: int = 15) -> list[Inquilino]:
+    if args.proprietarios < 1 or args.imoveis < 1 or args.inquilinos < 1:
+        parser.error("São necessários ao menos 1 proprietário, 1 imóvel e 1 inquilino")
+    args.prefixo = _prefixo(args.seed)
+    return args
+
+
+async def popular(args: argparse.Namespace, resumos: bool = True) -> None:
     """
-    Cria inquilinos com dados realistas brasileiros.
-    
+    Popula o banco já inicializado com as quantidades de args.
+    Também usado pelo benchmark para popular o banco em memória no próprio processo.
+
     Args:
-        quantidade: Número de inquilinos a criar.
-    
-    Returns:
-        Lista de inquilinos criados.
+        args: Argumentos do parse_args.
+        resumos: Se False, não reconstrói os resumos dos contratos no servidor
+            (o banco em memória do benchmark não implementa o $lookup usado).
     """
-    inquilinos = []
-    
-    for _ in range(quantidade):
-        inquilino = Inquilino(
-            nome=fake.name(),
-            cpf=fake.cpf(),
-            email=fake.email(),
-            telefone=fake.cellphone_number(),
-            renda_mensal=round(random.uniform(2000, 15000), 2)
+    if args.limpar:
+        await limpar_banco()
+
+    # Mesma regra do script original: até metade dos contratos são ativos
+    contratos_ativos = min(args.contratos // 2, args.imoveis)
+    inicio = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=args.processos) as pool:
+        proprietarios = await popular_colecao(
+            Proprietario, gerar_proprietarios, args.proprietarios, args, pool
         )
-        await inquilino.insert()
-        inquilinos.append(inquilino)
-    
-    print(f"{quantidade} inquilinos criados!")
-    return inquilinos
-
-
-async def criar_contratos(
-    inquilinos: list[Inquilino], 
-    imoveis: list[Imovel], 
-    quantidade: int = 12
-) -> list[Contrato]:
-    """
-    Cria contratos de aluguel entre inquilinos e imóveis.
-    
-    Regras:
-    - Um imóvel só pode ter um contrato ativo por vez
-    - Contratos ativos atualizam o status do imóvel para "Alugado"
-    
-    Args:
-        inquilinos: Lista de inquilinos disponíveis.
-        imoveis: Lista de imóveis disponíveis.
-        quantidade: Número de contratos a criar.
-    
-    Returns:
-        Lista de contratos criados.
-    """
-    contratos = []
-    imoveis_disponiveis = [i for i in imoveis if i.status == "Disponivel"]
-    
-    # Criar alguns contratos ativos
-    contratos_ativos = min(quantidade // 2, len(imoveis_disponiveis))
-    
-    for i in range(contratos_ativos):
-        imovel = imoveis_disponiveis[i]
-        inquilino = random.choice(inquilinos)
-        
-        # Contrato ativo - começou há alguns meses, termina no futuro
-        data_inicio = date.today() - timedelta(days=random.randint(30, 180))
-        data_fim = data_inicio + timedelta(days=random.randint(365, 730))
-        
-        contrato = Contrato(
-            inquilino=inquilino,
-            imovel=imovel,
-            data_inicio=data_inicio,
-            data_fim=data_fim,
-            valor_aluguel=imovel.valor_aluguel_base * random.uniform(0.95, 1.1),
-            status="Ativo"
+        print(f"👤 {proprietarios} proprietários criados!")
+
+        imoveis = await popular_colecao(
+            Imovel, gerar_imoveis, args.imoveis, args, pool,
+            args.proprietarios, contratos_ativos
         )
-        await contrato.insert()
-        contratos.append(contrato)
-        
-        # Atualizar status do imóvel
-        await imovel.set({"status": "Alugado"})
-    
-    # Criar alguns contratos encerrados (histórico)
-    contratos_encerrados = quantidade - contratos_ativos
-    
-    for _ in range(contratos_encerrados):
-        imovel = random.choice(imoveis)
-        inquilino = random.choice(inquilinos)
-        
-        # Contrato encerrado - no passado
-        data_fim = date.today() - timedelta(days=random.randint(30, 365))
-        data_inicio = data_fim - timedelta(days=random.randint(180, 730))
-        
-        status = random.choice(["Encerrado", "Cancelado"])
-        
-        contrato = Contrato(
-            inquilino=inquilino,
-            imovel=imovel,
-            data_inicio=data_inicio,
-            data_fim=data_fim,
-            valor_aluguel=imovel.valor_aluguel_base * random.uniform(0.9, 1.05),
-            status=status
+        print(f"{imoveis} imóveis criados!")
+
+        inquilinos = await popular_colecao(
+            Inquilino, gerar_inquilinos, args.inquilinos, args, pool
         )
-        await contrato.insert()
-        contratos.append(contrato)
-    
-    print(f"{quantidade} contratos criados ({contratos_ativos} ativos, {contratos_encerrados} encerrados)!")
-    return contratos
+        print(f"{inquilinos} inquilinos criados!")
+
+        contratos = await popular_colecao(
+            Contrato, gerar_contratos, args.contratos, args, pool,
+            args.imoveis, args.inquilinos, contratos_ativos
+        )
+        print(f"{contratos} contratos criados ({contratos_ativos} ativos, {args.contratos - contratos_ativos} encerrados)!")
+
+    # Os inserts acima não passam pelas rotas, então os contadores do dashboard
+    # e os resumos de imóvel/inquilino dos contratos são recalculados no servidor
+    await reconciliar()
+    if resumos:
+        await reconstruir_resumos()
+
+    print("=" * 50)
+    print(f"Banco de dados populado com sucesso em {time.perf_counter() - inicio:.1f}s!")
+    print(f"   - {proprietarios} proprietários")
+    print(f"   - {imoveis} imóveis")
+    print(f"   - {inquilinos} inquilinos")
+    print(f"   - {contratos} contratos")
+    print("=" * 50)
 
 
 async def main():
     """Função principal para popular o banco de dados."""
+    args = parse_args()
+
     print("=" * 50)
     print(" Iniciando população do banco de dados...")
     print("=" * 50)
-    
+
     await init_database()
-    
-    # Criar dados (sem limpar os existentes)
-    proprietarios = await criar_proprietarios(12)
-    imoveis = await criar_imoveis(proprietarios, 15)
-    inquilinos = await criar_inquilinos(15)
-    contratos = await criar_contratos(inquilinos, imoveis, 12)
-    
-    print("=" * 50)
-    print("Banco de dados populado com sucesso!")
-    print(f"   - {len(proprietarios)} proprietários")
-    print(f"   - {len(imoveis)} imóveis")
-    print(f"   - {len(inquilinos)} inquilinos")
-    print(f"   - {len(contratos)} contratos")
-    print("=" * 50)
-    print(f"   - {len(imoveis)} imóveis")
-    print(f"   - {len(inquilinos)} inquilinos")
-    print(f"   - {len(contratos)} contratos")
-    print("=" * 50)
+    await popular(args)
 
 
 if __name__ == "__main__":